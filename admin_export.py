@@ -0,0 +1,127 @@
+import streamlit as st
+import requests
+from supabase_client import make_submission_key, CONFLICT_KEY
+from storage import get_storage
+from submission_queue import get_submission_queue
+from questionnaire import load_questionnaire, label_stored_row
+from i18n import get_messages
+
+# --- survey2 / survey6 共通: 回答の保存と、管理者ページの送信キュー・スプレッドシート出力 ---
+# 2つのアプリは出力先のスプレッドシートだけが違う。保存・出力の処理はここに1つだけ置く。
+# secrets はアプリの再実行ごとに読み直す（このモジュールは import したプロセスで使い回される）。
+def storage_backend():
+    return st.secrets.get("storage_backend", "supabase")
+
+
+# True ならローカルのキュー経由で非同期に送信（Supabase に保存するときだけ）
+def write_behind():
+    return bool(st.secrets.get("write_behind", False)) and storage_backend() == "supabase"
+
+
+# --- 回答の保存（保存先は secrets の storage_backend で選ぶ。storage.py） ---
+def submit_record(data_dict, messages):
+    data_dict["exported"] = False  # 新規は未出力とする
+    data_dict[CONFLICT_KEY] = make_submission_key(data_dict)  # 同じ日・所属・名前の再送は同じ行に upsert
+    if write_behind():
+        get_submission_queue().enqueue(data_dict)  # ディスクに記録した時点で受付完了
+        return True
+    result = get_storage().insert(data_dict)
+    if not result["ok"]:
+        st.session_state["submit_error"] = f"{messages['submit_failed']} ({result['status']})"
+    return result["ok"]
+
+
+# 再起動後も最初のアクセスで送信スレッドを再開し、残っている回答を送る
+def resume_write_behind():
+    if write_behind():
+        get_submission_queue()
+
+
+# --- 保存先から未出力データをページ単位で取得（行のリストを順に返す） ---
+def iter_unexported_rows(page_size=None):
+    yield from get_storage().iter_unexported(page_size or int(st.secrets.get("fetch_page_size", 500)))
+
+
+# --- 保存先のデータをexported=trueに更新（チャンク単位でまとめて更新） ---
+def mark_as_exported(ids, chunk_size=None):
+    if not ids:
+        return []
+    return get_storage().mark_exported(ids, chunk_size or int(st.secrets.get("mark_chunk_size", 100)))
+
+
+# --- 1チャンク（ExportJob が区切った行）を1リクエストで書く ---
+# 保存先の選択肢はコードなので、シートの既存の行にそろえて日本語の表示名に戻してから書く
+# （variant はアプリの質問票・文言の差分。survey2 は旧版の表示名を使う）
+def export_to_gsheet(rows, writer, spreadsheet_name, sheet_name, spreadsheet_key=None, variant=None):
+    import pandas as pd
+    from gsheet_client import with_worksheet, ensure_header
+    schema, messages = load_questionnaire(variant=variant), get_messages("ja", variant)
+    rows = [label_stored_row(schema, row, messages) for row in rows]
+    df = pd.DataFrame(rows).drop(columns=["exported", CONFLICT_KEY], errors="ignore")
+    df = df.fillna("")
+    with_worksheet(spreadsheet_name, sheet_name, lambda sheet: ensure_header(sheet, df.columns.tolist()), spreadsheet_key)
+    with_worksheet(spreadsheet_name, sheet_name, lambda sheet: writer.append(sheet, df.values.tolist()), spreadsheet_key)
+
+
+# --- 送信キューの状況（write_behind のときだけ） ---
+def render_queue_status():
+    if not write_behind():
+        return
+    queue_stats = get_submission_queue().stats()
+    st.caption(f"📮 送信待ち: {queue_stats['depth']} 件（最古: {queue_stats['oldest_age']:.0f} 秒前）")
+    if queue_stats["last_error"]:
+        st.warning(f"⚠ Supabaseへの送信が失敗しています: {queue_stats['last_error']}")
+    if queue_stats["dead_letters"]:
+        st.error(f"❌ Supabaseに拒否された回答が {queue_stats['dead_letters']} 件あります（キューの dead_letter テーブルに退避）: {queue_stats['dead_letter_error']}")
+    if queue_stats["depth"] and st.button("📮 送信待ちを今すぐ送る"):
+        sent, error = get_submission_queue().flush()
+        st.info(f"{sent} 件を送信しました" + (f"（エラー: {error}）" if error else ""))
+
+
+# --- 未出力データ → スプレッドシート（チェックポイント付き）と、Google 認証のリセット ---
+def render_export(spreadsheet_name, sheet_name, spreadsheet_key=None, variant=None):
+    import gspread
+    from gsheet_client import invalidate_gsheet_cache, get_write_limiter, SheetWriter, format_write_summary
+    from export_job import ExportJob, get_export_checkpoint
+
+    backend = storage_backend()
+    if get_storage().exportable:
+        export_job_name = f"{spreadsheet_key or spreadsheet_name}/{sheet_name}"
+        if backend != "supabase":
+            export_job_name = f"{backend}:{export_job_name}"  # 保存先ごとに id が違うのでチェックポイントを分ける
+        checkpoint = get_export_checkpoint(export_job_name)
+        last_id, pending = checkpoint.load()
+        st.caption(f"🔖 チェックポイント: id ≦ {last_id} まで出力済み" + (f"（exported 未更新: {len(pending)} 件）" if pending else ""))
+        if st.button("📤 未出力データを出力する"):
+            # チャンクごとに「シートに書く → チェックポイントに記録 → その id だけ exported=true に更新」と進める。
+            # 途中で止まっても、次回は記録済みの id を更新してから続きを出力する（ページ単位で取得するのでメモリは1ページ分）
+            error = None
+            writer = SheetWriter(get_write_limiter())  # 書き込みの間隔を割り当て内に収め、429/5xx は再試行する
+            write = lambda rows: export_to_gsheet(rows, writer, spreadsheet_name, sheet_name, spreadsheet_key, variant)
+            job = ExportJob(checkpoint, writer.chunks, write, mark_as_exported)
+            try:
+                job.run(iter_unexported_rows())
+            except ValueError as e:
+                error = e  # ヘッダーの列順がずれている場合はそれ以降を出力しない
+            except (gspread.exceptions.APIError, requests.RequestException) as e:
+                error = f"スプレッドシートへの出力が途中で失敗しました（次回は続きから出力します）: {e}"
+            result = job.result
+            if result["busy"]:
+                st.warning("⚠ 別の画面で出力中です。終わってからもう一度お試しください")
+            if result["resumed"]:
+                st.info(f"🔖 前回シートに書き込み済みだった {result['resumed']} 件を exported=true に更新しました")
+            if error:
+                st.error(f"❌ {error}")
+            elif result["written"] == 0 and not result["busy"] and not result["failed"]:
+                st.warning("⚠ 未出力データはありません")
+            if result["written"]:
+                st.success(f"✅ {result['written']} 件のデータを出力し、{result['flagged'] - result['resumed']} 件を exported=true に更新しました！")
+                st.caption(format_write_summary(writer.summary()))
+            for r in result["failed"]:
+                st.error(f"❌ exported の更新に失敗しました（{r['status']}）: id={', '.join(str(i) for i in r['ids'])}（次回の出力で更新します）")
+    else:
+        st.info(f"ℹ 保存先（{backend}）は exported を管理しないため、出力は行いません")
+
+    if st.button("🔄 Google認証をリセット"):
+        invalidate_gsheet_cache()  # 認証切れ時に接続とシートのキャッシュを作り直す
+        st.info("Google Sheets の接続キャッシュを破棄しました")
@@ -0,0 +1,89 @@
+import pandas as pd
+import streamlit as st
+from supabase_client import get_supabase_client
+
+# --- トレーニング負荷の分析（管理者ページ用） ---
+# セッションRPE（sRPE）法: 1日の負荷 = トレーニング時間（分） × RPE。選手（所属・名前）ごとに
+#   急性負荷（acute）   : 直近7日の1日平均
+#   慢性負荷（chronic） : 直近28日の1日平均
+#   ACWR               : 急性 ÷ 慢性（1.5 を超えると故障リスクが高いとされる）
+#   monotony（単調性）  : 直近7日の平均 ÷ 標準偏差（Foster）
+#   strain（ストレイン） : 直近7日の合計 × monotony
+# を全期間について groupby + rolling でまとめて計算する（行ごとのループはしない）。
+# 記録のない日は負荷 0 として扱う。
+LOAD_COLUMNS = "id,date,team,name,exercise_time,exercise_rpe"
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+ACWR_ALERT = 1.5
+ANALYTICS_TTL = 600  # 秒（この間に新しい行が入れば、そのときに作り直す）
+ATHLETE = ["team", "name"]
+METRIC_COLUMNS = ATHLETE + ["date", "load", "acute_load", "chronic_load", "acwr", "monotony", "strain"]
+
+
+# --- 最新の id（新しい行が入ったらキャッシュを作り直すための目印） ---
+def latest_row_id():
+    res = get_supabase_client().select({"select": "id", "order": "id.desc", "limit": 1})
+    res.raise_for_status()
+    rows = res.json()
+    return rows[0]["id"] if rows else 0
+
+
+def fetch_training_rows(page_size=1000):
+    rows = []
+    for page in get_supabase_client().iter_pages({"select": LOAD_COLUMNS}, page_size):
+        rows.extend(page)
+    return pd.DataFrame(rows, columns=LOAD_COLUMNS.split(","))
+
+
+# --- 選手ごとの日次負荷（記録のない日は 0 で埋める。有効な行がなければ None） ---
+def daily_loads(df):
+    df = df.assign(
+        date=pd.to_datetime(df["date"], errors="coerce"),
+        team=df["team"].fillna("").astype(str).str.strip(),
+        name=df["name"].fillna("").astype(str).str.strip(),
+        load=pd.to_numeric(df["exercise_time"], errors="coerce") * pd.to_numeric(df["exercise_rpe"], errors="coerce")
+    ).dropna(subset=["date"])
+    if df.empty:
+        return None
+    daily = df.groupby(ATHLETE + ["date"])["load"].sum(min_count=1).fillna(0.0)
+    return daily.reset_index(ATHLETE).groupby(ATHLETE).resample("D")["load"].sum()
+
+
+def rolling(daily, window, func):
+    windows = daily.groupby(level=ATHLETE).rolling(window, min_periods=window)
+    return getattr(windows, func)().droplevel([0, 1])  # groupby が先頭に付けた所属・名前を外して元の索引に戻す
+
+
+# --- 負荷指標（所属・名前・日付ごとに1行） ---
+def compute_load_metrics(df):
+    daily = daily_loads(df)
+    if daily is None:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+    acute = rolling(daily, ACUTE_DAYS, "mean")
+    chronic = rolling(daily, CHRONIC_DAYS, "mean")
+    weekly_std = rolling(daily, ACUTE_DAYS, "std")
+    monotony = acute / weekly_std.where(weekly_std > 0)
+    return pd.DataFrame({
+        "load": daily,
+        "acute_load": acute,
+        "chronic_load": chronic,
+        "acwr": acute / chronic.where(chronic > 0),
+        "monotony": monotony,
+        "strain": acute * ACUTE_DAYS * monotony
+    }).reset_index()
+
+
+# --- 全期間の指標（TTL 付きでキャッシュ。latest_id が変われば作り直す） ---
+# local=True ならローカルのコピー（read_model.py）から読む。その場合 latest_id にはウォーターマークを渡す
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner="トレーニング負荷を計算しています...")
+def load_training_metrics(latest_id, local=False):
+    if local:
+        from read_model import get_read_model
+        return compute_load_metrics(get_read_model().read_frame(LOAD_COLUMNS.split(",")))
+    return compute_load_metrics(fetch_training_rows())
+
+
+# --- 選手ごとの最新日の指標（ACWR の高い順） ---
+def latest_by_athlete(metrics):
+    latest = metrics.sort_values("date").groupby(ATHLETE).tail(1)
+    return latest.sort_values("acwr", ascending=False, na_position="last").reset_index(drop=True)
@@ -0,0 +1,58 @@
+import io
+import os
+import streamlit as st
+from PIL import Image
+
+# --- 画像アセット（便の形・RPE の図） ---
+# 元の PNG を幅ごとに縮小・圧縮したバイト列をプロセス内で一度だけ作り、全セッションで使い回す。
+# 同じバイト列を st.image に渡すので、再実行してもファイルを読み直さず、ブラウザのキャッシュも効く。
+# 表示するのはスマホ用とPC用の2種類だけ（画面の幅はサーバーから分からないので、それ以上は作り分けない）
+MOBILE_WIDTH = 800     # スマホ（CSS幅 約400px × 高解像度ディスプレイ）
+DESKTOP_WIDTH = 1280
+VARIANT_WIDTHS = (MOBILE_WIDTH, DESKTOP_WIDTH)
+WEBP_QUALITY = 80
+MOBILE_KEYWORDS = ("Mobile", "Android", "iPhone", "iPad")
+
+
+# --- 幅ごとの画像を作る（ファイルが更新されたら mtime が変わるので作り直す） ---
+@st.cache_resource(show_spinner=False)
+def build_variants(path, mtime):
+    with Image.open(path) as original:
+        original = original.convert("RGBA" if "A" in original.getbands() or original.mode == "P" else "RGB")
+    variants = {}
+    for width in VARIANT_WIDTHS:
+        if width >= original.width:
+            image = original
+        else:
+            image = original.resize((width, round(original.height * width / original.width)), Image.LANCZOS)
+        variants[width] = encode(image)
+    return variants
+
+
+# --- WebP と最適化 PNG のうち小さい方を使う ---
+def encode(image):
+    candidates = []
+    buffer = io.BytesIO()
+    try:
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=6)
+        candidates.append(buffer.getvalue())
+    except (KeyError, OSError):
+        pass  # WebP に対応していない Pillow の場合は PNG のみ
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    candidates.append(buffer.getvalue())
+    return min(candidates, key=len)
+
+
+# --- 端末に合わせた幅（User-Agent でスマホかどうかを判定） ---
+def preferred_width():
+    try:
+        user_agent = st.context.headers.get("User-Agent", "")
+    except AttributeError:
+        user_agent = ""  # st.context がない古い Streamlit
+    return MOBILE_WIDTH if any(k in user_agent for k in MOBILE_KEYWORDS) else DESKTOP_WIDTH
+
+
+def show_chart(path, caption):
+    variants = build_variants(path, os.path.getmtime(path))
+    st.image(variants[preferred_width()], caption=caption, width="stretch")
@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+# --- 起動時間ベンチマーク ---
+# 無料ホスティングではアプリがスリープするため、選手が体感するのはコールドスタートの時間。
+# 各 survey*.py について、モジュールの import 時間・初回描画・再実行（rerun）の時間を計測し、
+# benchmarks/baseline.json と比べて遅くなっていないかを確認する。
+#
+#   python benchmarks/bench_startup.py           # 計測してベースラインと比較
+#   python benchmarks/bench_startup.py --save    # 計測結果をベースラインとして保存
+#
+# baseline.json はリポジトリに含める（計測したマシンの値なので、比べるのは同じマシン・同じ環境どうし）。
+# 別の環境（CI など）で比べるときは、変更前のコミットで --save してから変更後に実行する。
+# 依存パッケージを更新したとき・MODULES やアプリを増やしたときは --save で取り直してコミットする。
+#
+# Supabase はローカルで立てる偽の PostgREST に向け、secrets はダミー値を渡す。
+# 初回描画はキャッシュ（st.cache_resource など）の影響を受けないよう、アプリごとに別プロセスで計測する。
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+SCENARIOS = {
+    "form": {},              # 一般ユーザー用ページ
+    "ping": {"ping": "1"}    # UptimeRobot の ping
+}
+MODULES = [
+    "streamlit", "requests", "pandas", "gspread", "oauth2client.service_account",
+    "healthcheck", "supabase_client", "submission_queue", "gsheet_client", "assets", "questionnaire", "i18n", "analytics",
+    "validation", "storage", "csv_store", "read_model", "export_job", "downloads", "admin_export"
+]
+RERUNS = 5
+REPEAT = 3  # import・初回描画はプロセスごとにぶれるので、この回数だけ計測して最も速い回を使う
+WORKER_TIMEOUT = 300  # 秒
+REGRESSION_RATIO = 1.25  # ベースラインよりこの倍率以上遅ければ退行とみなす
+REGRESSION_MIN_SECONDS = 0.05  # 差がこれ未満なら測定のぶれとみなす（validation の import や ping の rerun は数ミリ秒）
+
+
+# --- 偽の PostgREST（取得と RPC は空、追加は 201、更新は 204 を返す） ---
+# 受け取ったリクエストは received に記録する（tests/ ではサブクラスで応答を差し替えて使う）
+class FakePostgrest(BaseHTTPRequestHandler):
+    received = []
+
+    def _reply(self, status, body=b""):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        url = urlsplit(self.path)
+        self.received.append({
+            "method": self.command,
+            "path": url.path,
+            "params": dict(parse_qsl(url.query)),
+            "headers": dict(self.headers),
+            "body": json.loads(raw) if raw else None
+        })
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(200, b"[]")
+
+    def do_POST(self):
+        if "/rpc/" in self.path:
+            self._reply(200, b"[]")
+        else:
+            self._reply(201)
+
+    def do_PATCH(self):
+        self._reply(204)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_backend(handler=FakePostgrest):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def stub_secrets(backend_url):
+    return {
+        "supabase_url": backend_url,
+        "supabase_key": "bench-key",
+        "admin_password": "bench-password",
+        "google_service_account": {
+            "type": "service_account",
+            "client_email": "bench@example.iam.gserviceaccount.com",
+            "private_key_id": "bench",
+            "private_key": "bench",
+            "client_id": "0"
+        }
+    }
+
+
+# --- import 時間（モジュールごとに新しいプロセスで計測。依存先の import も含む） ---
+def measure_import(module):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return {"seconds": float(proc.stdout)}
+
+
+# --- アプリ1本・1シナリオの計測（別プロセスで実行される） ---
+def run_worker(script, scenario, reruns):
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)  # 画像などの相対パスをアプリと同じにする
+
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_seconds = time.perf_counter() - start
+
+    backend = start_fake_backend()
+    at = AppTest.from_file(str(ROOT / script), default_timeout=WORKER_TIMEOUT)
+    for key, value in stub_secrets(backend).items():
+        at.secrets[key] = value
+    for key, value in SCENARIOS[scenario].items():
+        at.query_params[key] = value
+
+    start = time.perf_counter()
+    at.run()
+    first_render = time.perf_counter() - start
+
+    rerun_times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - start)
+
+    return {
+        "testing_import": import_seconds,
+        "first_render": first_render,
+        "rerun_median": statistics.median(rerun_times) if rerun_times else None,
+        "rerun_max": max(rerun_times) if rerun_times else None,
+        "error": at.exception[0].message if len(at.exception) else None
+    }
+
+
+def measure_app(script, scenario, reruns):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", script, scenario, "--reruns", str(reruns)],
+        cwd=ROOT, capture_output=True, text=True, timeout=WORKER_TIMEOUT
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(lines[-1])
+
+
+# --- 同じ計測を repeat 回行い、metric が最も小さい回を返す（すべて失敗したら最後の回） ---
+def best_of(measure, metric, repeat):
+    runs = [measure() for _ in range(repeat)]
+    ok = [r for r in runs if r.get(metric) is not None]
+    return min(ok, key=lambda r: r[metric]) if ok else runs[-1]
+
+
+# --- ベースラインとの比較（遅くなった項目を返す） ---
+def find_regressions(results, baseline):
+    regressions = []
+
+    def compare(name, current, base):
+        if isinstance(current, (int, float)) and isinstance(base, (int, float)) and base > 0:
+            if current / base >= REGRESSION_RATIO and current - base >= REGRESSION_MIN_SECONDS:
+                regressions.append(f"{name}: {base:.3f}s -> {current:.3f}s ({current / base:.2f}x)")
+
+    for module, current in results["imports"].items():
+        compare(f"import {module}", current.get("seconds"), baseline.get("imports", {}).get(module, {}).get("seconds"))
+    for script, scenarios in results["apps"].items():
+        for scenario, current in scenarios.items():
+            base = baseline.get("apps", {}).get(script, {}).get(scenario, {})
+            for metric in ("first_render", "rerun_median"):
+                compare(f"{script} [{scenario}] {metric}", current.get(metric), base.get(metric))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="survey*.py の起動時間ベンチマーク")
+    parser.add_argument("--save", action="store_true", help="結果を benchmarks/baseline.json に保存する")
+    parser.add_argument("--reruns", type=int, default=RERUNS, help="初回描画のあとに計測する rerun の回数")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="import・初回描画を計測する回数（最も速い回を使う）")
+    parser.add_argument("--scripts", nargs="*", help="計測するスクリプト（省略時は survey*.py すべて）")
+    parser.add_argument("--worker", nargs=2, metavar=("SCRIPT", "SCENARIO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(*args.worker, args.reruns)))
+        return 0
+
+    scripts = args.scripts or sorted(p.name for p in ROOT.glob("survey*.py"))
+    results = {"python": sys.version.split()[0], "imports": {}, "apps": {}}
+
+    for module in MODULES:
+        results["imports"][module] = best_of(lambda: measure_import(module), "seconds", args.repeat)
+        r = results["imports"][module]
+        print(f"import {module:<30} " + (f"{r['seconds']:.3f}s" if "seconds" in r else f"ERROR {r['error']}"))
+
+    for script in scripts:
+        results["apps"][script] = {}
+        for scenario in SCENARIOS:
+            r = best_of(lambda: measure_app(script, scenario, args.reruns), "first_render", args.repeat)
+            results["apps"][script][scenario] = r
+            if r.get("first_render") is not None:
+                print(f"{script:<15} {scenario:<5} first={r['first_render']:.3f}s rerun={r['rerun_median'] or 0:.3f}s"
+                      + (f"  (app error: {r['error']})" if r.get("error") else ""))
+            else:
+                print(f"{script:<15} {scenario:<5} ERROR {r['error']}")
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"baseline saved: {BASELINE_PATH}")
+        return 0
+
+    if BASELINE_PATH.exists():
+        regressions = find_regressions(results, json.loads(BASELINE_PATH.read_text(encoding="utf-8")))
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    print("baseline がありません（--save で作成）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
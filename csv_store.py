@@ -0,0 +1,141 @@
+import csv
+import io
+import os
+import streamlit as st
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- CSV への追記と過去の回答の読み込み（survey.py） ---
+# 追記は1行分の CSV 文字列を先に作っておき、ファイルをロックしてから書く（pandas は使わない）。
+# ヘッダーの有無もロックの中で確認するので、同時に送信されても行が混ざったりヘッダーが重複したりしない。
+# 過去の回答はファイルの末尾から必要な行だけを読み、更新時刻とサイズが変わらない限り読み直さない。
+# 件数は追記された分の改行だけを数えて求める。
+# ※ 1回答は1行（改行を含む値がない）ことを前提にしている。
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def to_csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        self.file = open(self.path, "a+b")
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+
+
+class CsvStore:
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.header = to_csv_line(self.columns)
+
+    # --- 1回答の追記（空のファイルならヘッダーも書く） ---
+    def append(self, record):
+        line = to_csv_line([record.get(column, "") for column in self.columns])
+        with FileLock(self.path):
+            with open(self.path, "a", encoding="utf-8", newline="") as f:
+                if f.tell() == 0:
+                    line = self.header + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # --- ファイルの状態（キャッシュのキーに使う） ---
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read_page(self, page, page_size):
+        signature = self.signature()
+        if signature is None:
+            return {"columns": self.columns, "rows": [], "total": 0}
+        return read_tail_page(self.path, page, page_size, signature)
+
+
+# --- 改行の数（前回数えたサイズまでは数え直さず、追記された分だけ数える） ---
+# 回答が1件増えるたびに signature が変わって read_tail_page のキャッシュが外れるが、
+# ファイル全体を読み直さずに済むよう、(数えたサイズ, 改行の数) をプロセス全体で覚えておく。
+@st.cache_resource
+def get_newline_counts():
+    return {}
+
+
+def count_newlines(path, f, size):
+    counts = get_newline_counts()
+    counted_size, newlines = counts.get(path, (0, 0))
+    if counted_size > size:
+        counted_size, newlines = 0, 0  # ファイルが小さくなった（作り直された）ので最初から数える
+    f.seek(counted_size)
+    remaining = size - counted_size
+    while remaining > 0 and (chunk := f.read(min(TAIL_BLOCK_SIZE, remaining))):
+        newlines += chunk.count(b"\n")
+        remaining -= len(chunk)
+    counts[path] = (size, newlines)
+    return newlines
+
+
+# --- 行数（ヘッダーを除く）。中身は解析せず改行を数えるだけ ---
+def count_rows(path, f, size):
+    lines = count_newlines(path, f, size)
+    if size:
+        f.seek(size - 1)
+        if f.read(1) != b"\n":
+            lines += 1  # 最後の行に改行がない
+    return max(lines - 1, 0)
+
+
+# --- 末尾から count 行を読む（ファイル全体は読まない） ---
+def read_tail_lines(f, size, count):
+    data = b""
+    position = size
+    while position > 0 and data.count(b"\n") <= count:
+        step = min(TAIL_BLOCK_SIZE, position)
+        position -= step
+        f.seek(position)
+        data = f.read(step) + data
+    lines = data.splitlines()
+    if position > 0:
+        lines = lines[1:]  # 途中から読んだ先頭の行は欠けているので捨てる
+    return lines
+
+
+# --- 過去の回答の1ページ（新しい順）。signature（更新時刻・サイズ）が同じならキャッシュを使う ---
+@st.cache_data(max_entries=32)
+def read_tail_page(path, page, page_size, signature):
+    size = signature[1]
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+        total = count_rows(path, f, size)
+        end = total - page * page_size
+        start = max(end - page_size, 0)
+        if end <= 0:
+            return {"columns": header, "rows": [], "total": total}
+        lines = read_tail_lines(f, size, total - start)[-(total - start):]
+    rows = [dict(zip(header, values)) for values in csv.reader(line.decode("utf-8") for line in lines[:end - start])]
+    return {"columns": header, "rows": rows[::-1], "total": total}
@@ -0,0 +1,136 @@
+import csv
+import glob
+import os
+import tempfile
+import time
+from supabase_client import get_supabase_client, build_filters
+
+# --- 管理者ページのダウンロード（CSV / Parquet） ---
+# スプレッドシート出力（API の割り当て・シートの行数上限がある）を使わずに、期間・所属で絞った行をファイルで渡す。
+# Supabase からページ単位で取得し、1ページずつ一時ファイルに書き足すので、全件をメモリに載せない。
+# Parquet は PostgREST の列の型（OpenAPI の format）に合わせて型を付ける（日付は date、整数は int64 など）。
+# 一時ファイル（選手の体調データ）は専用のディレクトリに置き、作ってから DOWNLOAD_MAX_AGE 秒たったものは
+# 次にダウンロードを作るときに消す（作ったセッションが閉じられても残り続けないように）。
+DOWNLOAD_PAGE_SIZE = 1000
+DOWNLOAD_DIR = os.path.join(tempfile.gettempdir(), "condition_downloads")
+DOWNLOAD_MAX_AGE = 3600  # 秒
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+PANDAS_DTYPES = {
+    "bigint": "Int64",
+    "integer": "Int64",
+    "smallint": "Int64",
+    "numeric": "float64",
+    "real": "float64",
+    "double precision": "float64",
+    "boolean": "boolean",
+    "text": "string",
+    "character varying": "string"
+}
+
+
+def iter_condition_pages(date_from=None, date_to=None, teams=None, page_size=DOWNLOAD_PAGE_SIZE):
+    params = dict(build_filters(date_from=date_from, date_to=date_to, teams=teams), select="*")
+    yield from get_supabase_client().iter_pages(params, page_size)
+
+
+# --- CSV（Excel で文字化けしないよう BOM 付き UTF-8 で開いたファイルに書く） ---
+def write_csv(pages, f):
+    writer = None
+    count = 0
+    for rows in pages:
+        if writer is None:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+# --- 1ページ分の行に列の型を付ける（型が分からない列は、ページごとに型がぶれないよう文字列・小数にそろえる） ---
+# dtypes（最初のページの型）を渡すと、型が分からない列はその型に合わせる。
+# 同じ列でもページによって値が整数だけだったり "" が混ざったりするので、2ページ目以降の型推定には頼らない。
+def to_frame(rows, formats, dtypes=None):
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    for column in df.columns:
+        fmt = formats.get(column, "")
+        if fmt == "date":
+            df[column] = pd.to_datetime(df[column], errors="coerce").dt.date
+        elif fmt.startswith("timestamp"):
+            df[column] = pd.to_datetime(df[column], errors="coerce", utc="with time zone" in fmt)
+        elif fmt in PANDAS_DTYPES:
+            df[column] = df[column].astype(PANDAS_DTYPES[fmt])
+        elif dtypes is not None and column in dtypes:
+            df[column] = conform(df[column], dtypes[column])
+        elif pd.api.types.is_integer_dtype(df[column]) and column != "id":
+            df[column] = df[column].astype("float64")
+        elif not pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+            df[column] = df[column].astype("string")
+    return df
+
+
+# --- 列を最初のページの型に合わせる（数値にできない値は欠損にする） ---
+def conform(series, dtype):
+    import pandas as pd
+    if pd.api.types.is_bool_dtype(dtype):
+        return series.astype("boolean")
+    if pd.api.types.is_numeric_dtype(dtype):
+        return pd.to_numeric(series, errors="coerce").astype(dtype)
+    return series.astype("string")
+
+
+# --- Parquet（1ページを1つの row group として書き足す。スキーマは最初のページで決め、以降のページはその型にそろえる） ---
+def write_parquet(pages, path, formats):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    dtypes = None
+    count = 0
+    try:
+        for rows in pages:
+            df = to_frame(rows, formats, dtypes)
+            if writer is None:
+                dtypes = df.dtypes
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(df.reindex(columns=schema.names), schema=schema, preserve_index=False))
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+# --- 古い一時ファイルの削除（消したファイルの数を返す） ---
+def remove_stale_downloads(max_age=DOWNLOAD_MAX_AGE):
+    removed = 0
+    for path in glob.glob(os.path.join(DOWNLOAD_DIR, "condition_*")):
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # 別のセッションが先に消した
+    return removed
+
+
+# --- ダウンロード用の一時ファイルを作る（(パス, 件数) を返す。途中で失敗したらファイルを消して例外を投げ直す） ---
+def build_download(fmt, date_from=None, date_to=None, teams=None):
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    remove_stale_downloads()
+    pages = iter_condition_pages(date_from, date_to, teams)
+    with tempfile.NamedTemporaryFile(prefix="condition_", suffix=f".{fmt}", dir=DOWNLOAD_DIR, delete=False) as f:
+        path = f.name
+    try:
+        if fmt == "csv":
+            with open(path, "w", encoding="utf-8-sig", newline="") as f:
+                count = write_csv(pages, f)
+        else:
+            count = write_parquet(pages, path, get_supabase_client().column_formats())
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, count
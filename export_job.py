@@ -0,0 +1,107 @@
+import json
+import sqlite3
+import threading
+import time
+import streamlit as st
+
+# --- チェックポイント付きの出力ジョブ（未出力データ → スプレッドシート） ---
+# チャンク（スプレッドシートへの1リクエスト分）ごとに
+#   1. シートに書く → 2. 書いたチャンクの id をチェックポイントに記録 → 3. その id だけを exported=true に更新 → 4. 記録を消す
+# の順に進める。途中で止まっても、次回は記録に残っている「書いたが更新できていない」id を先に更新してから続きを出力する。
+# シートへの書き込みが失敗したチャンクは更新しないので、次回そのまま出力し直される（既に書いたチャンクは二重に書かない）。
+# チェックポイントは送信キューと同じくローカルの SQLite に置く。
+CHECKPOINT_DB_PATH = "export_checkpoint.db"
+
+
+class ExportCheckpoint:
+    def __init__(self, path=CHECKPOINT_DB_PATH, job="default"):
+        self.path = path
+        self.job = job
+        self.lock = threading.Lock()  # 同じ出力先へのジョブは同時に1つだけ
+        self._execute("PRAGMA journal_mode=WAL")
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS checkpoint (
+                job TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                pending TEXT NOT NULL DEFAULT '[]',
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA synchronous=FULL")  # シートに書いた記録は確実にディスクへ残す
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # --- (最後に書いた id, 書いたが exported を更新できていない id の一覧) ---
+    def load(self):
+        rows = self._execute("SELECT last_id, pending FROM checkpoint WHERE job = ?", (self.job,))
+        if not rows:
+            return 0, []
+        return rows[0][0], json.loads(rows[0][1])
+
+    # --- シートに書いた（まだ exported を更新していない）id を記録する ---
+    def set_pending(self, ids):
+        last_id = max([self.load()[0], *ids])
+        self._execute(
+            "INSERT INTO checkpoint (job, last_id, pending, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(job) DO UPDATE SET last_id = excluded.last_id, pending = excluded.pending, updated_at = excluded.updated_at",
+            (self.job, last_id, json.dumps(ids), time.time())
+        )
+
+
+class ExportJob:
+    # chunks: 行（dict）のリストをチャンクに分ける関数、write: 1チャンクをシートに書く関数、mark: id を exported=true にする関数
+    def __init__(self, checkpoint, chunks, write, mark):
+        self.checkpoint = checkpoint
+        self.chunks = chunks
+        self.write = write
+        self.mark = mark
+        self.result = {"busy": False, "resumed": 0, "written": 0, "flagged": 0, "failed": []}
+
+    # --- 記録してある id を更新する（更新できなかった id は記録に残す） ---
+    def _flag(self, ids):
+        results = self.mark(ids)
+        failed = [i for r in results if not r["ok"] for i in r["ids"]]
+        self.checkpoint.set_pending(failed)
+        self.result["flagged"] += len(ids) - len(failed)
+        self.result["failed"] += [r for r in results if not r["ok"]]
+        return not failed
+
+    # --- pages: 未出力の行のページ（id の昇順）。更新に失敗したらそこで止める ---
+    def run(self, pages):
+        if not self.checkpoint.lock.acquire(blocking=False):
+            self.result["busy"] = True  # 別の管理者が出力中
+            return self.result
+        try:
+            return self._run(pages)
+        finally:
+            self.checkpoint.lock.release()
+
+    def _run(self, pages):
+        _, pending = self.checkpoint.load()
+        if pending:
+            if not self._flag(pending):
+                return self.result
+            self.result["resumed"] = len(pending)  # 前回シートに書いたが更新できていなかった行
+        skip = set(pending)
+        for rows in pages:
+            rows = [row for row in rows if row["id"] not in skip]
+            for chunk in self.chunks(rows):
+                ids = [row["id"] for row in chunk]
+                self.write(chunk)
+                self.checkpoint.set_pending(ids)
+                self.result["written"] += len(ids)
+                if not self._flag(ids):
+                    return self.result
+        return self.result
+
+
+# --- プロセス全体で出力先ごとに1つのチェックポイントを共有 ---
+@st.cache_resource
+def get_export_checkpoint(job):
+    return ExportCheckpoint(st.secrets.get("export_checkpoint_path", CHECKPOINT_DB_PATH), job)
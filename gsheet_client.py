@@ -0,0 +1,186 @@
+import random
+import threading
+import time
+import streamlit as st
+import gspread
+import requests
+from oauth2client.service_account import ServiceAccountCredentials
+from supabase_client import split_batches
+
+# --- Google Sheets 共通接続 ---
+# 認証済みクライアントとワークシートのハンドルをプロセス全体でキャッシュし、
+# 再実行やセッションごとの OAuth・Drive 検索（client.open）をなくす。
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+
+@st.cache_resource
+def get_gspread_client():
+    creds_dict = st.secrets["google_service_account"]
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(creds_dict), SCOPE)
+    return gspread.authorize(creds)
+
+
+# --- ワークシートのハンドル（スプレッドシート名・シート名ごとにキャッシュ） ---
+# spreadsheet_key があれば Drive 検索をせずにキーで直接開く
+@st.cache_resource
+def get_worksheet(spreadsheet_name, sheet_name, spreadsheet_key=None):
+    client = get_gspread_client()
+    if spreadsheet_key:
+        book = client.open_by_key(spreadsheet_key)
+    else:
+        book = client.open(spreadsheet_name)
+    return book.worksheet(sheet_name)
+
+
+# --- キャッシュの破棄（認証切れ時などに呼ぶ） ---
+def invalidate_gsheet_cache():
+    get_header_cache().clear()
+    get_worksheet.clear()
+    get_gspread_client.clear()
+
+
+def is_auth_error(e):
+    response = getattr(e, "response", None)
+    return getattr(response, "status_code", None) == 401
+
+
+# --- キャッシュ済みワークシートで処理を実行（認証エラー時は1回だけ作り直して再実行） ---
+def with_worksheet(spreadsheet_name, sheet_name, func, spreadsheet_key=None):
+    try:
+        return func(get_worksheet(spreadsheet_name, sheet_name, spreadsheet_key))
+    except gspread.exceptions.APIError as e:
+        if not is_auth_error(e):
+            raise
+        invalidate_gsheet_cache()
+        return func(get_worksheet(spreadsheet_name, sheet_name, spreadsheet_key))
+
+
+# --- ヘッダー行の確認 ---
+# シート全体（get_all_values）ではなく1行目だけを読み、結果はプロセス内で使い回す。
+@st.cache_resource
+def get_header_cache():
+    return {}
+
+
+def ensure_header(sheet, columns):
+    columns = [str(c) for c in columns]
+    cache = get_header_cache()
+    cache_key = (sheet.spreadsheet.id, sheet.id)
+    header = cache.get(cache_key)
+    if header is None:
+        header = sheet.row_values(1)
+        if not header:
+            sheet.insert_row(columns, 1)  # ヘッダーがない場合のみ追加
+            header = columns
+        cache[cache_key] = header
+    if header != columns:
+        raise ValueError(f"スプレッドシートのヘッダーが列順と一致しません: シート={header} / データ={columns}")
+
+
+# --- 書き込みの流量制御と再試行 ---
+# Sheets API の書き込みは1分あたりの回数に割り当てがあり、1リクエストの本文サイズにも上限がある。
+# 行を件数・サイズで区切って1チャンクずつ送り、トークンバケットで送信の間隔を割り当て内に収める。
+# 429（割り当て超過）と 5xx は指数バックオフ＋ジッターで再試行する。
+# 接続できなかった場合（接続エラー・接続のタイムアウト）も再試行するが、送信後の読み取りのタイムアウトは再試行しない
+# （シートには書けている場合があり、もう一度送ると同じ行が重複する）。
+WRITES_PER_MINUTE = 60   # 割り当て（1分あたり・ユーザーあたり）
+WRITE_BURST = 10         # 連続して送ってよい回数
+CHUNK_ROWS = 500
+CHUNK_BYTES = 1_000_000  # 1リクエストあたりの本文サイズの上限（目安）
+WRITE_RETRIES = 5
+BACKOFF_BASE = 1.0       # 秒
+BACKOFF_MAX = 64.0       # 秒
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate  # 1秒あたりに補充するトークン数
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # --- トークンを1つ取る（足りなければ補充されるまで待ち、待った秒数を返す） ---
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+# --- 割り当てはサービスアカウント単位なので、プロセス全体で1つのバケットを共有する ---
+@st.cache_resource
+def get_write_limiter():
+    per_minute = float(st.secrets.get("sheets_writes_per_minute", WRITES_PER_MINUTE))
+    return TokenBucket(per_minute / 60, int(st.secrets.get("sheets_write_burst", WRITE_BURST)))
+
+
+def retry_status(e):
+    if isinstance(e, gspread.exceptions.APIError):
+        return getattr(getattr(e, "response", None), "status_code", None)
+    return "connection"  # 接続エラー・接続のタイムアウト（requests.ConnectTimeout も ConnectionError の一種）
+
+
+class SheetWriter:
+    def __init__(self, limiter, chunk_rows=CHUNK_ROWS, chunk_bytes=CHUNK_BYTES, retries=WRITE_RETRIES):
+        self.limiter = limiter
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.retries = retries
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.requests = 0
+        self.retried = 0
+        self.throttled = 0.0  # トークンバケットと再試行で待った秒数
+
+    def chunks(self, rows):
+        for _, chunk in split_batches(rows, self.chunk_rows, self.chunk_bytes):
+            yield chunk
+
+    # --- 1チャンクの追記（送信前にトークンを取り、429/5xx は待ち時間を倍々にしながら再試行） ---
+    def append(self, sheet, rows):
+        for attempt in range(self.retries + 1):
+            self.throttled += self.limiter.acquire()
+            self.requests += 1
+            try:
+                sheet.append_rows(rows)
+                self.rows += len(rows)
+                return
+            except (gspread.exceptions.APIError, requests.ConnectionError) as e:  # ReadTimeout は再試行しない
+                status = retry_status(e)
+                if (status != "connection" and status not in RETRY_STATUS) or attempt == self.retries:
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))  # フルジッター
+                self.retried += 1
+                self.throttled += delay
+                time.sleep(delay)
+
+    def append_rows(self, sheet, rows):
+        for chunk in self.chunks(rows):
+            self.append(sheet, chunk)
+
+    # --- スループット（出力の最後に表示する） ---
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "requests": self.requests,
+            "retries": self.retried,
+            "seconds": seconds,
+            "rows_per_second": self.rows / seconds if seconds > 0 else 0.0,
+            "throttled_seconds": self.throttled
+        }
+
+
+def format_write_summary(summary):
+    return (f"📈 {summary['rows']} 行 / {summary['requests']} リクエスト / {summary['seconds']:.1f} 秒"
+            f"（{summary['rows_per_second']:.1f} 行/秒、再試行 {summary['retries']} 回、待機 {summary['throttled_seconds']:.1f} 秒）")
@@ -0,0 +1,37 @@
+import streamlit as st
+
+# --- ping監視対応（UptimeRobotなど） ---
+# アプリ本体の重い import（pandas・gspread など）や secrets の読み込みより前に呼び出し、
+# ?ping=1 なら即座に pong を返す。?ping=deep なら Supabase への疎通も確認する（結果は TTL の間キャッシュ）。
+DEEP_PING_TTL = 60  # 秒
+DEEP_PING_TIMEOUT = 5  # 秒
+
+
+@st.cache_data(ttl=DEEP_PING_TTL, show_spinner=False)
+def check_supabase():
+    import requests  # deep のときだけ読み込む
+    from supabase_client import TABLE_NAME
+
+    url = st.secrets["supabase_url"].rstrip("/")
+    key = st.secrets["supabase_key"]
+    try:
+        res = requests.get(
+            f"{url}/rest/v1/{TABLE_NAME}",
+            params={"select": "id", "limit": 1},
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            timeout=DEEP_PING_TIMEOUT
+        )
+        return res.status_code == 200, str(res.status_code)
+    except requests.RequestException as e:
+        return False, str(e)
+
+
+def handle_ping():
+    ping = st.query_params.get("ping")
+    if ping == "1":
+        st.write("pong")  # 応答確認用
+        st.stop()         # それ以上の処理を止める
+    elif ping == "deep":
+        ok, detail = check_supabase()
+        st.write("pong" if ok else f"supabase unreachable: {detail}")
+        st.stop()
@@ -0,0 +1,37 @@
+import json
+import streamlit as st
+
+# --- 表示言語とメッセージカタログ（messages.json） ---
+# 日本語版・英語版を別々のアプリとして動かさず、1つのアプリで言語だけを切り替える。
+# 文言はすべて messages.json に置き、起動時に1回だけ読み込んでプロセス全体で使い回す。
+# 選択肢の保存値は言語に依存しないコード（"yes"、"cough" など）なので、どちらの言語で答えても同じ列・同じ値になる。
+CATALOG_PATH = "messages.json"
+DEFAULT_LANGUAGE = "ja"
+
+
+# --- カタログの読み込み（訳のないキーは日本語で補う） ---
+# variants はアプリごとに上書きする文言（variant → 言語 → キー）。survey2・survey3 は既存のデータと向きを
+# 合わせるため、スライダーの左右の文言を旧版のまま使う（左端が 0。左右を入れ替えると保存値の意味が逆になる）。
+@st.cache_resource
+def load_catalog(path=CATALOG_PATH, variant=None):
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    overrides = catalog.pop("variants", {})[variant] if variant else {}
+    base = catalog[DEFAULT_LANGUAGE]
+    return {lang: {**base, **messages, **overrides.get(lang, {})} for lang, messages in catalog.items()}
+
+
+# --- 言語の決定（?lang= → ブラウザの言語 → 既定の言語） ---
+def detect_language(default=DEFAULT_LANGUAGE):
+    catalog = load_catalog()
+    lang = st.query_params.get("lang")
+    if lang in catalog:
+        return lang
+    locale = getattr(st.context, "locale", None) or st.context.headers.get("Accept-Language", "")
+    lang = locale.split(",")[0].split("-")[0].strip().lower()
+    return lang if lang in catalog else default
+
+
+def get_messages(lang, variant=None):
+    catalog = load_catalog(variant=variant)
+    return catalog.get(lang, catalog[DEFAULT_LANGUAGE])
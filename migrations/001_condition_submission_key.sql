@@ -0,0 +1,8 @@
+-- 冪等キー: 同じ日・所属・名前の回答は1行にまとめる（送信の二度押し・再送で重複させない）
+-- アプリは submission_key を on_conflict に指定して upsert（resolution=merge-duplicates）する
+alter table condition add column if not exists submission_key text;
+
+create unique index if not exists condition_submission_key_idx
+    on condition (submission_key);
+
+notify pgrst, 'reload schema';
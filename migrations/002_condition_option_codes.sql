@@ -0,0 +1,63 @@
+-- 選択肢の保存値を言語に依存しないコードにそろえる
+-- 日本語版・英語版を1つのアプリ（survey6.py、?lang=ja / ?lang=en）にまとめ、
+-- 選択肢は表示文言ではなく questionnaire.json のコード（"yes"、"cough" など）で保存するようにした。
+-- ここでは既存の行の表示文言（日本語・英語）をコードに置き換える。対応表にない値はそのまま残す。
+-- ※ 旧英語版のスライダー（4. 体調・5. 疲労感・12. 故障の程度・13. 練習強度）は左右の向きが日本語版と逆だったが、
+--   値そのものは変換しない（集計する場合は injury が 'no' / 'yes' 以前の英語の値だった行に注意）。
+create temporary table option_codes (field text, label text, code text);
+
+insert into option_codes (field, label, code) values
+    ('injury', '無', 'no'), ('injury', '有', 'yes'),
+    ('injury', 'without', 'no'), ('injury', 'with', 'yes'),
+    ('bowel_movement', '有', 'yes'), ('bowel_movement', '無', 'no'),
+    ('bowel_movement', 'Yes', 'yes'), ('bowel_movement', 'No', 'no'),
+
+    ('sleep_issues', '夢を見た', 'dream'), ('sleep_issues', 'Had a dream', 'dream'),
+    ('sleep_issues', '何回も目覚めた', 'woke_up'), ('sleep_issues', 'Woke up many times', 'woke_up'),
+    ('sleep_issues', '何回もトイレに行った', 'toilet'), ('sleep_issues', 'Went to restroom many times', 'toilet'),
+    ('sleep_issues', '寝汗をかいた', 'night_sweat'), ('sleep_issues', 'Perspired in sleep', 'night_sweat'),
+    ('sleep_issues', '寝付けなかった', 'hard_to_sleep'), ('sleep_issues', 'Uneasy to sleep', 'hard_to_sleep'),
+    ('sleep_issues', 'uneasy to sleep', 'hard_to_sleep'),
+    ('sleep_issues', '普段より寝付けなかった', 'harder_than_usual'),
+    ('sleep_issues', '特になし', 'none'), ('sleep_issues', 'None', 'none'),
+    ('sleep_issues', 'nothing in particular', 'none'),
+
+    ('symptoms', '特になし', 'none'), ('symptoms', 'None', 'none'),
+    ('symptoms', '咳', 'cough'), ('symptoms', 'Cough', 'cough'),
+    ('symptoms', '鼻水', 'runny_nose'), ('symptoms', 'Runny nose', 'runny_nose'),
+    ('symptoms', '頭痛', 'headache'), ('symptoms', 'Headache', 'headache'),
+    ('symptoms', '息苦しさ', 'short_breath'), ('symptoms', 'Shortness of breath', 'short_breath'),
+    ('symptoms', '下痢', 'diarrhea'), ('symptoms', 'Diarrhea', 'diarrhea'),
+    ('symptoms', '喉の痛み', 'sore_throat'), ('symptoms', 'Sore throat', 'sore_throat'),
+    ('symptoms', '悪寒', 'chills'), ('symptoms', 'Chills', 'chills'),
+    ('symptoms', '腹痛', 'abdominal_pain'), ('symptoms', 'Abdominal pain', 'abdominal_pain'),
+    ('symptoms', '熱感', 'feverish'), ('symptoms', 'Feeling feverish', 'feverish'),
+    ('symptoms', '倦怠感', 'fatigue'), ('symptoms', 'Severe fatigue（extreme tiredness）', 'fatigue'),
+    ('symptoms', '吐き気', 'nausea'), ('symptoms', 'Nausea', 'nausea'),
+    ('symptoms', '痰', 'phlegm'), ('symptoms', 'Phlegm', 'phlegm'),
+    ('symptoms', '月経', 'menstruation'), ('symptoms', 'Menstruation', 'menstruation'),
+    ('symptoms', '月経痛（腰痛・下腹部痛等）', 'menstrual_pain'),
+    ('symptoms', '月経前不調（腰痛やむくみ、体重増加）', 'premenstrual'),
+    ('symptoms', '不正出血', 'irregular_bleeding'), ('symptoms', 'Irregular bleeding', 'irregular_bleeding'),
+    ('symptoms', '服薬', 'medication'), ('symptoms', 'Taking medication', 'medication'),
+    ('symptoms', 'その他', 'other'), ('symptoms', 'Other（please specify）', 'other');
+
+-- 単一選択
+update condition c set injury = m.code
+    from option_codes m where m.field = 'injury' and c.injury = m.label;
+update condition c set bowel_movement = m.code
+    from option_codes m where m.field = 'bowel_movement' and c.bowel_movement = m.label;
+
+-- 複数選択（「, 」区切りの項目を1つずつ置き換え、順番は保つ）
+update condition c set sleep_issues = (
+    select string_agg(coalesce(m.code, t.item), ', ' order by t.ord)
+    from unnest(string_to_array(c.sleep_issues, ', ')) with ordinality as t(item, ord)
+    left join option_codes m on m.field = 'sleep_issues' and m.label = t.item
+) where c.sleep_issues <> '';
+update condition c set symptoms = (
+    select string_agg(coalesce(m.code, t.item), ', ' order by t.ord)
+    from unnest(string_to_array(c.symptoms, ', ')) with ordinality as t(item, ord)
+    left join option_codes m on m.field = 'symptoms' and m.label = t.item
+) where c.symptoms <> '';
+
+drop table option_codes;
@@ -0,0 +1,62 @@
+-- サーバー側の集計（管理者ページは集計結果だけを受け取り、select=* で全行を取得しない）
+-- アプリからは SupabaseClient.daily_counts() / athlete_averages() で呼び出す。
+-- どちらも PostgREST のクエリ（select=列、team=in.(...) など）でさらに絞り込める。
+
+-- 日付×所属ごとの回答数と回答した選手の数
+create or replace view condition_daily_team_counts
+with (security_invoker = true) as
+select
+    c.date::date as date,
+    c.team,
+    count(*) as submissions,
+    count(distinct c.name) as athletes
+from condition c
+group by c.date::date, c.team;
+
+-- 期間内（省略時は全期間）の選手ごとの平均
+create or replace function condition_athlete_averages(date_from date default null, date_to date default null)
+returns table (
+    team text,
+    name text,
+    days bigint,
+    first_date date,
+    last_date date,
+    health numeric,
+    fatigue numeric,
+    sleep_time numeric,
+    sleep_quality numeric,
+    appetite numeric,
+    training_intensity numeric,
+    exercise_time numeric,
+    exercise_rpe numeric,
+    weight numeric
+)
+language sql
+stable
+security invoker
+as $$
+    select
+        c.team::text,
+        c.name::text,
+        count(distinct c.date::date),
+        min(c.date::date),
+        max(c.date::date),
+        round(avg(c.health::numeric), 1),
+        round(avg(c.fatigue::numeric), 1),
+        round(avg(c.sleep_time::numeric), 2),
+        round(avg(c.sleep_quality::numeric), 1),
+        round(avg(c.appetite::numeric), 1),
+        round(avg(c.training_intensity::numeric), 1),
+        round(avg(c.exercise_time::numeric), 1),
+        round(avg(c.exercise_rpe::numeric), 2),
+        round(avg(c.weight::numeric), 2)
+    from condition c
+    where (date_from is null or c.date::date >= date_from)
+      and (date_to is null or c.date::date <= date_to)
+    group by c.team, c.name
+$$;
+
+grant select on condition_daily_team_counts to anon, authenticated;
+grant execute on function condition_athlete_averages(date, date) to anon, authenticated;
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,18 @@
+-- 旧英語版（survey2.py）の症状の選択肢のうち、002 の対応表になかったものをコードに置き換える
+-- survey2.py は旧版の選択肢（臭い・味がわかりにくい、嘔吐 など）を questionnaire.json の variants で残したので、
+-- それらにもコード（loss_of_smell / loss_of_taste / vomiting）を割り当てた。002 と同じく、対応表にない値はそのまま残す。
+create temporary table option_codes (field text, label text, code text);
+
+insert into option_codes (field, label, code) values
+    ('symptoms', '臭いがわかりにくい', 'loss_of_smell'), ('symptoms', 'Loss of smell（anosmia）', 'loss_of_smell'),
+    ('symptoms', '味がわかりにくい', 'loss_of_taste'), ('symptoms', 'Loss of taste', 'loss_of_taste'),
+    ('symptoms', '嘔吐', 'vomiting'), ('symptoms', 'Vomiting', 'vomiting'),
+    ('symptoms', 'のどの痛み', 'sore_throat'), ('symptoms', '強いだるさ（倦怠感）', 'fatigue');
+
+update condition c set symptoms = (
+    select string_agg(coalesce(m.code, t.item), ', ' order by t.ord)
+    from unnest(string_to_array(c.symptoms, ', ')) with ordinality as t(item, ord)
+    left join option_codes m on m.field = 'symptoms' and m.label = t.item
+) where c.symptoms <> '';
+
+drop table option_codes;
@@ -0,0 +1,239 @@
+import json
+import time
+from datetime import date
+import streamlit as st
+from assets import show_chart
+from validation import compile_rules, check_question
+
+# --- 質問票（questionnaire.json）の読み込みと描画 ---
+# 質問・ウィジェットの種類・範囲・選択肢・表示条件・必須ルールは JSON に書き、
+# ここで1回だけコンパイルして（選択肢のリストなどを作って）プロセス全体で使い回す。
+# 質問を追加するときは JSON に1行足せばよく、スクリプトをコピーする必要はない。
+# 文言は messages.json（i18n.py）から "<key>.label" などのキーで引く。選択肢は言語に依存しないコードで持ち、
+# 表示するときだけ "<key>.options.<code>" の訳に置き換える。
+# variants は既存のシート・データに合わせるアプリごとの差分（質問の key → 上書きする項目）。
+# survey2・survey3 は選択肢の一覧と必須が survey6 と違う（スライダーの左右の向きは messages.json の variants）。
+SCHEMA_PATH = "questionnaire.json"
+SLIDER_MIN = 0
+SLIDER_MAX = 100
+SLIDER_DEFAULT = 50
+
+
+@st.cache_resource
+def load_questionnaire(path=SCHEMA_PATH, variant=None):
+    with open(path, encoding="utf-8") as f:
+        schema = json.load(f)
+    overrides = schema.pop("variants", {})[variant] if variant else {}
+    for section in schema["sections"]:
+        section["questions"] = [compile_question({**q, **overrides.get(q["key"], {})}) for q in section["questions"]]
+    return schema
+
+
+# --- 質問1件をウィジェットの仕様にする（選択肢はここで作っておき、再実行のたびに作らない） ---
+def compile_question(question):
+    spec = dict(question)
+    if spec["widget"] == "secret_slider":
+        spec.setdefault("min", SLIDER_MIN)
+        spec.setdefault("max", SLIDER_MAX)
+        spec.setdefault("default", SLIDER_DEFAULT)
+        spec["options"] = tuple(range(spec["min"], spec["max"] + 1))
+    elif "range" in spec:
+        low, high = spec["range"]
+        spec["options"] = tuple(range(low, high + 1))
+    else:
+        spec["options"] = tuple(spec.get("options", ()))
+    if "placeholder" in spec:
+        spec["options"] = (None,) + spec["options"]  # 未選択（None）を先頭に置く
+    spec["rules"] = compile_rules(spec)
+    return spec
+
+
+def iter_questions(schema):
+    for section in schema["sections"]:
+        yield from section["questions"]
+
+
+# --- 表示条件（visible_if） ---
+def is_visible(spec, values):
+    condition = spec.get("visible_if")
+    if not condition:
+        return True
+    value = values.get(condition["field"])
+    if "equals" in condition:
+        return value == condition["equals"]
+    return condition["contains"] in (value or [])
+
+
+# --- スライダー（数値非表示） ---
+def secret_slider(spec, messages):
+    key = spec["key"]
+    st.markdown(f"**{messages[key + '.label']}**")
+    st.select_slider(
+        label=" ",
+        options=spec["options"],
+        value=spec["default"],
+        format_func=lambda x: "",
+        key=spec["key"],
+        label_visibility="collapsed"
+    )
+    st.markdown(f"<div style='display: flex; justify-content: space-between;'><span>{messages[key + '.left']}</span><span>{messages[key + '.right']}</span></div>", unsafe_allow_html=True)
+
+
+def draw_widget(spec, messages):
+    key, widget = spec["key"], spec["widget"]
+    label = f"**{messages[key + '.label']}**"
+    option_label = lambda code: messages[f"{key}.options.{code}"]
+    if widget == "date":
+        st.date_input(label, value=date.today(), key=key)
+    elif widget == "text":
+        st.text_input(label, key=key)
+    elif widget == "number":
+        st.number_input(label, spec["min"], spec["max"], step=spec.get("step"), key=key)
+    elif widget == "secret_slider":
+        secret_slider(spec, messages)
+    elif widget == "radio":
+        st.radio(label, spec["options"], format_func=option_label, key=key)
+    elif widget == "multiselect":
+        st.multiselect(label, spec["options"], format_func=option_label, key=key)
+    elif widget == "selectbox":
+        placeholder, fmt = messages["placeholder"], messages.get(key + ".format", "{}")
+        st.selectbox(label, spec["options"], format_func=lambda x: placeholder if x is None else fmt.format(x), key=key)
+    else:
+        raise ValueError(f"未対応のウィジェットです: {widget}")
+
+
+# --- 質問1件の描画 ---
+# フォームモードでは入力中に表示を切り替えられないので、条件付きの質問も常に表示して条件を添える
+# 送信時にエラーになった質問は、まだ直っていなければ入力欄の下にエラーを出す
+def render_question(spec, messages, form_mode):
+    key = spec["key"]
+    conditional = "visible_if" in spec
+    if conditional and not form_mode and not is_visible(spec, st.session_state):
+        return
+    if "image" in spec:
+        show_chart(spec["image"], caption=messages[key + ".image"])
+    draw_widget(spec, messages)
+    if conditional and form_mode:
+        st.caption(messages.get(key + ".hint", " "))
+    else:
+        st.caption(messages.get(key + ".caption", " "))
+    if key in st.session_state.get("field_errors", {}):
+        error = check_question(spec, st.session_state.get(key), messages)
+        if error:
+            st.error(error)
+
+
+# --- セクションの描画（fragment のセクションは逐次モードではそのセクションだけを再実行する） ---
+def render_section(section, messages, form_mode, debug=False):
+    def run():
+        start = time.perf_counter()
+        for spec in section["questions"]:
+            render_question(spec, messages, form_mode)
+        if debug and section.get("fragment"):
+            stats = st.session_state.setdefault("rerun_stats", {})
+            count = stats.get(section["id"], (0, 0.0))[0] + 1
+            stats[section["id"]] = (count, (time.perf_counter() - start) * 1000)
+            st.caption(f"🔁 {section['id']}: {count} 回目 / {stats[section['id']][1]:.1f} ms")
+
+    if section.get("fragment") and not form_mode:
+        st.fragment(run)()
+    else:
+        run()  # フォーム内ではフラグメントを使えない（入力中は再実行されないので不要）
+
+
+# --- 質問票全体の描画（送信ボタンが押されたかを返す。送信は on_click の submit_questionnaire で行う） ---
+# 送信ボタンは無効化しない（on_click で無効化すると、押した回のクリックが捨てられて送信されない）。
+def render_questionnaire(schema, messages, form_mode, on_click=None, debug=False):
+    with st.form("condition_form") if form_mode else st.container():
+        for section in schema["sections"]:
+            render_section(section, messages, form_mode, debug)
+        submit_button = st.form_submit_button if form_mode else st.button
+        return submit_button(messages["submit"], on_click=on_click)
+
+
+# --- 送信（送信ボタンの on_click から呼ぶ。submit(values) が True なら送信済みにする） ---
+# on_click はクリックを受けた再実行の前に実行されるので、押した回のクリックで入力チェックから送信まで済ませ、
+# 続く描画ではもうお礼のページ（またはエラー）を表示する。
+# 送信中（submitting）・送信済み（submitted）の間に届いたクリックは何もしない（連打しても POST は1回）。
+# 別の端末からの再送は submission_key の upsert で1行にまとまる。
+def submit_questionnaire(schema, messages, submit):
+    state = st.session_state
+    if state.get("submitting") or state.get("submitted"):
+        return
+    state["submitting"] = True
+    try:
+        state["submit_error"] = None
+        values = collect_values(schema)  # 表示条件を満たさない回答はここで "" になる
+        errors = state["field_errors"] = validate(schema, values, messages)
+        if errors:
+            # エラーはすべて一度に表示する（入力欄の下と、送信ボタンの下の一覧）
+            state["submit_error"] = "\n".join(
+                [messages["errors_summary"].format(count=len(errors))] + [f"- {m}" for m in errors.values()]
+            )
+        elif submit(values):
+            state["submitted"] = True
+        elif not state["submit_error"]:
+            state["submit_error"] = messages["submit_failed"]
+    finally:
+        state["submitting"] = False
+
+
+# --- 回答の取り出し（表示されていない質問は "" にする） ---
+def collect_values(schema):
+    values = {}
+    for spec in iter_questions(schema):
+        values[spec["key"]] = st.session_state.get(spec["key"])
+    for spec in iter_questions(schema):
+        if not is_visible(spec, values):
+            values[spec["key"]] = ""
+    return values
+
+
+# --- 入力チェック（表示されている質問をすべて評価し、{key: メッセージ} を質問順で返す） ---
+def validate(schema, values, messages):
+    errors = {}
+    for spec in iter_questions(schema):
+        if not is_visible(spec, values):
+            continue
+        error = check_question(spec, values.get(spec["key"]), messages)
+        if error:
+            errors[spec["key"]] = error
+    return errors
+
+
+# --- Supabase に送るレコード（選択肢はコードのまま、複数選択は「, 」区切り、日付は文字列） ---
+def build_record(schema, values):
+    record = {}
+    for spec in iter_questions(schema):
+        value = values[spec["key"]]
+        if spec["widget"] == "multiselect":
+            value = ", ".join(value or [])
+        elif spec["widget"] == "date":
+            value = str(value)
+        record[spec["key"]] = value
+    return record
+
+
+# --- スプレッドシートに直接書くレコード（選択肢はコードではなく表示名にする。survey3/3OK/4） ---
+def build_label_record(schema, values, messages):
+    labeled = dict(values)
+    for spec in iter_questions(schema):
+        key, value = spec["key"], values[spec["key"]]
+        if spec["widget"] == "radio" and value:
+            labeled[key] = messages[f"{key}.options.{value}"]
+        elif spec["widget"] == "multiselect" and value:
+            labeled[key] = [messages[f"{key}.options.{code}"] for code in value]
+    return build_record(schema, labeled)
+
+
+# --- 保存済みの行（選択肢はコード）を表示名にする（管理者ページのスプレッドシート出力。シートの列は日本語の表示名） ---
+# 複数選択は「, 」区切りの項目ごとに置き換える。コードでない値（コードにする前に保存された行の表示名など）はそのまま残す。
+def label_stored_row(schema, row, messages):
+    labeled = dict(row)
+    for spec in iter_questions(schema):
+        key, value = spec["key"], row.get(spec["key"])
+        if spec["widget"] == "radio" and value:
+            labeled[key] = messages.get(f"{key}.options.{value}", value)
+        elif spec["widget"] == "multiselect" and value:
+            labeled[key] = ", ".join(messages.get(f"{key}.options.{code}", code) for code in value.split(", "))
+    return labeled
@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+import streamlit as st
+from supabase_client import SupabaseClient, get_supabase_client
+
+# --- ローカルの読み取り用コピー（condition テーブル） ---
+# 管理者ページの分析・検索・出力のたびに Supabase から全件を取り直さないよう、
+# condition の行を SQLite に写しておき、id の最大値（ウォーターマーク）より新しい行だけを取りに行く。
+# 既存の行の更新（exported の更新や同じ冪等キーでの再送）は差分同期では取り込まれないので、
+# 必要なら全件再同期（resync）する。ウォーターマークが失われた場合も resync で作り直せる。
+#
+#   python read_model.py sync      # 差分同期（取得件数と遅れを表示）
+#   python read_model.py resync    # 全件再同期
+#   python read_model.py status    # 件数・ウォーターマーク・最終同期からの経過時間
+#
+# コマンドラインでは SUPABASE_URL / SUPABASE_KEY の環境変数（または --url / --key）を使う。
+READ_MODEL_PATH = "read_model.db"
+TABLE_NAME = "condition"
+SYNC_PAGE_SIZE = 1000
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ReadModel:
+    def __init__(self, client, path=READ_MODEL_PATH, page_size=SYNC_PAGE_SIZE):
+        self.client = client
+        self.path = path
+        self.page_size = page_size
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._create_tables(conn)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _create_tables(self, conn):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} (id INTEGER PRIMARY KEY)")
+        conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _state(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_state(self, conn, **values):
+        conn.executemany(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(key, json.dumps(value)) for key, value in values.items()]
+        )
+
+    # --- Supabase 側に新しい列が増えていればローカルにも足す ---
+    def _ensure_columns(self, conn, columns):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")}
+        for column in columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {quote_identifier(column)}")
+                existing.add(column)
+
+    def _store(self, conn, rows):
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        self._ensure_columns(conn, columns)
+        sql = (f"INSERT OR REPLACE INTO {TABLE_NAME} ({', '.join(quote_identifier(c) for c in columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        conn.executemany(sql, [
+            [json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v for v in map(row.get, columns)]
+            for row in rows
+        ])
+
+    def watermark(self):
+        with self._connect() as conn:
+            return self._state(conn, "watermark", 0)
+
+    # --- 差分同期（ウォーターマークより新しい行をページ単位で取得し、ページごとにコミットする） ---
+    def sync(self):
+        start = time.perf_counter()
+        pulled = 0
+        conn = self._connect()
+        try:
+            watermark = self._state(conn, "watermark", 0)
+            for rows in self.client.iter_pages({"select": "*"}, self.page_size, after_id=watermark):
+                with conn:
+                    self._store(conn, rows)
+                    watermark = rows[-1]["id"]
+                    self._set_state(conn, watermark=watermark)
+                pulled += len(rows)
+            with conn:
+                self._set_state(conn, synced_at=time.time())
+        finally:
+            conn.close()
+        return {"pulled": pulled, "watermark": watermark, "seconds": time.perf_counter() - start, **self.lag()}
+
+    # --- 全件再同期（ローカルのコピーを作り直す） ---
+    def resync(self):
+        with self._connect() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+            conn.execute("DROP TABLE IF EXISTS sync_state")
+            self._create_tables(conn)
+        return self.sync()
+
+    # --- 遅れ（Supabase の最新 id との差・最終同期からの経過秒数） ---
+    def lag(self):
+        res = self.client.select({"select": "id", "order": "id.desc", "limit": 1})
+        res.raise_for_status()
+        rows = res.json()
+        with self._connect() as conn:
+            watermark = self._state(conn, "watermark", 0)
+            synced_at = self._state(conn, "synced_at")
+        return {
+            "lag_ids": max((rows[0]["id"] if rows else 0) - watermark, 0),
+            "lag_seconds": time.time() - synced_at if synced_at else None
+        }
+
+    def status(self):
+        with self._connect() as conn:
+            count = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+            watermark = self._state(conn, "watermark", 0)
+            synced_at = self._state(conn, "synced_at")
+        return {
+            "rows": count,
+            "watermark": watermark,
+            "since_sync": time.time() - synced_at if synced_at else None
+        }
+
+    # --- ローカルのコピーを DataFrame で読む（columns で列を絞れる） ---
+    def read_frame(self, columns=None, where=None, params=()):
+        import pandas as pd  # 管理者ページとコマンドラインでしか使わない
+        with self._connect() as conn:
+            existing = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")]
+            selected = [c for c in (columns or existing) if c in existing]
+            sql = f"SELECT {', '.join(quote_identifier(c) for c in selected)} FROM {TABLE_NAME}"
+            if where:
+                sql += f" WHERE {where}"
+            df = pd.read_sql_query(sql + " ORDER BY id", conn, params=params)
+        return df.reindex(columns=columns or existing)
+
+
+# --- プロセス全体で1つのローカルコピーを共有 ---
+@st.cache_resource
+def get_read_model():
+    return ReadModel(
+        get_supabase_client(),
+        path=st.secrets.get("read_model_path", READ_MODEL_PATH),
+        page_size=int(st.secrets.get("read_model_page_size", SYNC_PAGE_SIZE))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="condition テーブルのローカルコピー（SQLite）の同期")
+    parser.add_argument("command", choices=["sync", "resync", "status"])
+    parser.add_argument("--db", default=READ_MODEL_PATH, help="SQLite ファイルのパス")
+    parser.add_argument("--url", default=os.environ.get("SUPABASE_URL"), help="Supabase の URL")
+    parser.add_argument("--key", default=os.environ.get("SUPABASE_KEY"), help="Supabase の API キー")
+    parser.add_argument("--page-size", type=int, default=SYNC_PAGE_SIZE)
+    args = parser.parse_args()
+    if not args.url or not args.key:
+        parser.error("SUPABASE_URL と SUPABASE_KEY（または --url / --key）を指定してください")
+
+    model = ReadModel(SupabaseClient(args.url, args.key), args.db, args.page_size)
+    if args.command == "status":
+        result = model.status()
+    else:
+        result = getattr(model, args.command)()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,305 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+import streamlit as st
+import requests
+from supabase_client import get_supabase_client, build_filters, CONFLICT_KEY
+
+# --- 保存先（ストレージ）の共通インターフェース ---
+# 回答の保存先は secrets の storage_backend で切り替える（アプリごとの既定は get_storage の引数で渡す）。
+#   "supabase"（既定）: Supabase REST（supabase_client.py）
+#   "sqlite"          : ローカルの SQLite（WAL）。1拠点だけで運用する場合、朝の送信ラッシュもネットワークなしで数ミリ秒で書ける
+#   "csv"             : ローカルの CSV（csv_store.py）
+#   "sheets"          : Google スプレッドシートへ直接追記（gsheet_client.py）
+# どの保存先も insert / bulk_insert / query を同じ形で返す。
+#   insert        → {"ok": bool, "status": ...}
+#   bulk_insert   → [{"start": 先頭の位置, "count": 件数, "ok": bool, "status": ...}, ...]
+#   query         → 行（dict）のリストをページ単位で返すイテレーター（追加した順）
+# exportable が True の保存先（Supabase・SQLite）は行ごとに id と exported を持ち、スプレッドシートへの出力に使える。
+#   iter_unexported → 未出力の行のリストをページ単位で返すイテレーター（id の昇順）
+#   mark_exported   → [{"ids": [...], "ok": bool, "status": ...}, ...]
+# CSV・スプレッドシートはそれ自体が出力先（人が読むファイル）なので exportable ではなく、この2つは持たない。
+STORAGE_PAGE_SIZE = 1000
+SQLITE_DB_PATH = "condition.db"
+CSV_PATH = "condition.csv"
+
+
+class StorageBackend:
+    exportable = False
+
+    # 1行ずつ insert する（まとめて書ける保存先は上書きする）
+    def bulk_insert(self, records):
+        results = []
+        for start, record in enumerate(records):
+            results.append(dict(self.insert(record), start=start, count=1))
+        return results
+
+
+def in_range(row, date_from, date_to, teams):
+    value = str(row.get("date", ""))
+    return ((not date_from or value >= date_from) and (not date_to or value <= date_to)
+            and (not teams or row.get("team") in teams))
+
+
+def paginate(rows, page_size):
+    page = []
+    for row in rows:
+        page.append(row)
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+# --- Supabase ---
+class SupabaseBackend(StorageBackend):
+    exportable = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, record):
+        try:
+            res = self.client.insert([record], on_conflict=CONFLICT_KEY)
+        except requests.RequestException as e:
+            return {"ok": False, "status": str(e)}
+        ok = res.status_code == 201
+        return {"ok": ok, "status": res.status_code if ok else f"{res.status_code} {res.text[:200]}"}
+
+    def bulk_insert(self, records):
+        return self.client.bulk_insert(records, on_conflict=CONFLICT_KEY)
+
+    def query(self, date_from=None, date_to=None, teams=None, page_size=STORAGE_PAGE_SIZE):
+        params = dict(build_filters(date_from=date_from, date_to=date_to, teams=teams), select="*")
+        return self.client.iter_pages(params, page_size)
+
+    def iter_unexported(self, page_size=STORAGE_PAGE_SIZE):
+        return self.client.iter_pages({"exported": "eq.false", "select": "*"}, page_size)
+
+    def mark_exported(self, ids, chunk_size=100):
+        return self.client.mark_exported(ids, chunk_size)
+
+
+# --- SQLite（WAL・SQL は固定の文字列にしてプリペアドステートメントを使い回す） ---
+class SqliteBackend(StorageBackend):
+    exportable = True
+    INSERT_SQL = (
+        "INSERT INTO condition (submission_key, exported, date, team, name, payload, created_at) "
+        "VALUES (:submission_key, 0, :date, :team, :name, :payload, :created_at) "
+        "ON CONFLICT(submission_key) DO UPDATE SET "
+        "exported = 0, date = excluded.date, team = excluded.team, name = excluded.name, payload = excluded.payload"
+    )
+    RANGE_SQL = (
+        "SELECT id, exported, payload FROM condition WHERE id > :last_id "
+        "AND (:date_from IS NULL OR date >= :date_from) AND (:date_to IS NULL OR date <= :date_to) "
+        "ORDER BY id LIMIT :page_size"
+    )
+    UNEXPORTED_SQL = "SELECT id, exported, payload FROM condition WHERE exported = 0 AND id > :last_id ORDER BY id LIMIT :page_size"
+    MARK_SQL = "UPDATE condition SET exported = 1 WHERE id = ?"
+
+    def __init__(self, path=SQLITE_DB_PATH):
+        self.path = path
+        self._local = threading.local()  # 文のキャッシュは接続ごとなので、接続はスレッドごとに1つ作って使い回す
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS condition (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    submission_key TEXT UNIQUE,
+                    exported INTEGER NOT NULL DEFAULT 0,
+                    date TEXT,
+                    team TEXT,
+                    name TEXT,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS condition_date_team_idx ON condition (date, team)")
+            conn.execute("CREATE INDEX IF NOT EXISTS condition_exported_idx ON condition (exported, id)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # WAL ではアプリが落ちても書き込み済みの回答は失われない
+            self._local.conn = conn
+        return conn
+
+    def _params(self, record):
+        payload = {k: v for k, v in record.items() if k not in ("id", "exported")}
+        return {
+            "submission_key": record.get(CONFLICT_KEY),
+            "date": str(record.get("date", "")),
+            "team": record.get("team"),
+            "name": record.get("name"),
+            "payload": json.dumps(payload, ensure_ascii=False, default=str),
+            "created_at": time.time()
+        }
+
+    def insert(self, record):
+        try:
+            with self._connection() as conn:
+                conn.execute(self.INSERT_SQL, self._params(record))
+        except sqlite3.Error as e:
+            return {"ok": False, "status": str(e)}
+        return {"ok": True, "status": "inserted"}
+
+    def bulk_insert(self, records):
+        try:
+            with self._connection() as conn:
+                conn.executemany(self.INSERT_SQL, [self._params(record) for record in records])
+        except sqlite3.Error as e:
+            return [{"start": 0, "count": len(records), "ok": False, "status": str(e)}]
+        return [{"start": 0, "count": len(records), "ok": True, "status": "inserted"}]
+
+    # --- id の昇順にページ単位で取得（キーセット方式。途中で exported が更新されてもずれない） ---
+    def _pages(self, sql, page_size, **params):
+        last_id = 0
+        while True:
+            rows = self._connection().execute(sql, dict(params, last_id=last_id, page_size=page_size)).fetchall()
+            if not rows:
+                return
+            yield [{"id": row[0], **json.loads(row[2]), "exported": bool(row[1])} for row in rows]
+            last_id = rows[-1][0]
+
+    def query(self, date_from=None, date_to=None, teams=None, page_size=STORAGE_PAGE_SIZE):
+        pages = self._pages(self.RANGE_SQL, page_size, date_from=date_from, date_to=date_to)
+        if not teams:
+            return pages
+        # 所属の数は変わるので SQL には入れず、取得した行を絞り込む（SQL は固定の1文のまま）
+        return paginate((row for page in pages for row in page if row.get("team") in teams), page_size)
+
+    def iter_unexported(self, page_size=STORAGE_PAGE_SIZE):
+        return self._pages(self.UNEXPORTED_SQL, page_size)
+
+    def mark_exported(self, ids, chunk_size=100):
+        results = []
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            try:
+                with self._connection() as conn:
+                    conn.executemany(self.MARK_SQL, [(record_id,) for record_id in chunk])
+                results.append({"ids": chunk, "ok": True, "status": "updated"})
+            except sqlite3.Error as e:
+                results.append({"ids": chunk, "ok": False, "status": str(e)})
+        return results
+
+
+# --- CSV ---
+# columns を省略すると、最初に追記する回答の key の順を列にする（既存のファイルはヘッダーに合わせる）
+class CsvBackend(StorageBackend):
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = list(columns or [])
+        self.store = None
+
+    def _store(self, record):
+        if self.store is None:
+            from csv_store import CsvStore
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                with open(self.path, encoding="utf-8", newline="") as f:
+                    self.columns = next(csv.reader(f))
+            self.store = CsvStore(self.path, self.columns or list(record))
+        return self.store
+
+    def insert(self, record):
+        try:
+            self._store(record).append(record)
+        except OSError as e:
+            return {"ok": False, "status": str(e)}
+        return {"ok": True, "status": "appended"}
+
+    def query(self, date_from=None, date_to=None, teams=None, page_size=STORAGE_PAGE_SIZE):
+        if not os.path.exists(self.path):
+            return iter(())
+
+        def rows():
+            with open(self.path, encoding="utf-8", newline="") as f:
+                yield from (row for row in csv.DictReader(f) if in_range(row, date_from, date_to, teams))
+
+        return paginate(rows(), page_size)
+
+    # --- 過去の回答の1ページ（新しい順。ファイルの末尾から読む。csv_store.CsvStore.read_page） ---
+    def read_page(self, page, page_size):
+        return self._store({}).read_page(page, page_size)
+
+
+# --- Google スプレッドシート ---
+# columns を省略すると回答の key の順を列にする。
+# header=True ならヘッダーがなければ追加し、列順が違えば書かない。header=False のシート（1行目からデータ）は
+# columns の順で値だけを追記し、取得するときも columns の順で列名を付ける。
+class SheetsBackend(StorageBackend):
+    def __init__(self, spreadsheet_name, sheet_name, columns=None, spreadsheet_key=None, header=True):
+        self.spreadsheet_name = spreadsheet_name
+        self.sheet_name = sheet_name
+        self.spreadsheet_key = spreadsheet_key
+        self.columns = list(columns or [])
+        self.header = header
+
+    def _with_sheet(self, func):
+        from gsheet_client import with_worksheet  # gspread はスプレッドシートを使うときだけ読み込む
+        return with_worksheet(self.spreadsheet_name, self.sheet_name, func, self.spreadsheet_key)
+
+    def insert(self, record):
+        return self.bulk_insert([record])[0]
+
+    def bulk_insert(self, records):
+        from gsheet_client import get_write_limiter, SheetWriter, ensure_header
+        if not records:
+            return []
+        columns = self.columns or list(records[0])
+        rows = [["" if record.get(column) is None else record[column] for column in columns] for record in records]
+        writer = SheetWriter(get_write_limiter())
+        results, start = [], 0
+        for chunk in writer.chunks(rows):
+            try:
+                if self.header:
+                    self._with_sheet(lambda sheet: ensure_header(sheet, columns))
+                self._with_sheet(lambda sheet: writer.append(sheet, chunk))
+                results.append({"start": start, "count": len(chunk), "ok": True, "status": "appended"})
+            except Exception as e:  # gspread の APIError・接続エラー・ヘッダーの不一致
+                results.append({"start": start, "count": len(chunk), "ok": False, "status": str(e)})
+            start += len(chunk)
+        return results
+
+    def query(self, date_from=None, date_to=None, teams=None, page_size=STORAGE_PAGE_SIZE):
+        if self.header:
+            records = self._with_sheet(lambda sheet: sheet.get_all_records())
+        else:
+            records = [dict(zip(self.columns, values)) for values in self._with_sheet(lambda sheet: sheet.get_all_values())]
+        return paginate((row for row in records if in_range(row, date_from, date_to, teams)), page_size)
+
+
+# --- 保存先を選ぶ（アプリごとにプロセス全体で1つ） ---
+# 設定の優先順: secrets の [storage.<app>] → 引数（アプリごとの設定）→ secrets の同じ名前 → 既定値。
+# secrets.toml は同じディレクトリのアプリで共有されるので、survey6 向けの storage_backend・csv_path などが
+# 引数で保存先を決めているアプリ（survey.py・survey3.py）に効かないよう、引数を secrets の共通の値より優先する。
+# そのアプリだけ保存先を変えるときは [storage.<app>] に書く。
+#   例: survey.py は get_storage("survey", storage_backend="csv", csv_path="condition_survey.csv", storage_columns=[...])
+#       secrets.toml に [storage.survey] csv_path = "..." と書けば survey.py の CSV だけを移せる
+@st.cache_resource
+def get_storage(app=None, **settings):
+    overrides = st.secrets.get("storage", {}).get(app, {}) if app else {}
+
+    def setting(name, default=None):
+        if name in overrides:
+            return overrides[name]
+        if name in settings:
+            return settings[name]
+        return st.secrets.get(name, default)
+
+    backend = setting("storage_backend", "supabase")
+    if backend == "supabase":
+        return SupabaseBackend(get_supabase_client())
+    if backend == "sqlite":
+        return SqliteBackend(setting("sqlite_path", SQLITE_DB_PATH))
+    if backend == "csv":
+        return CsvBackend(setting("csv_path", CSV_PATH), setting("storage_columns"))
+    if backend == "sheets":
+        return SheetsBackend(setting("storage_spreadsheet_name"), setting("storage_sheet_name", "condition"),
+                             setting("storage_columns"), setting("storage_spreadsheet_key"), setting("storage_header", True))
+    raise ValueError(f"未対応の保存先です: {backend}")
@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import threading
+import time
+import streamlit as st
+from supabase_client import get_supabase_client, CONFLICT_KEY
+
+# --- 送信キュー（ライトビハインド） ---
+# 回答はまずローカルの SQLite に書き込んで即座に受付完了とし、
+# バックグラウンドのスレッドが Supabase へまとめて配列 insert する。
+# Supabase が落ちていても回答はディスクに残り、復旧後に送られる。
+QUEUE_DB_PATH = "submission_queue.db"
+FLUSH_INTERVAL = 2.0   # 通常時の送信間隔（秒）
+FLUSH_BATCH_SIZE = 100
+MAX_BACKOFF = 60.0     # 送信失敗時の待ち時間の上限（秒）
+# PostgREST が行の内容を理由に拒否したときのステータス（値の型違い・存在しない列・制約違反・本文が大きすぎる）。
+# これらは何度送っても通らないので、バッチを半分ずつに分けて送り直し、1行でも拒否される行は dead_letter に移す。
+# 401/403/404（キーやテーブルの設定ミス）・408/429・5xx・接続エラーはキュー全体の問題なので、そのまま残して再送する。
+REJECTED_STATUS = (400, 409, 413, 422)
+
+
+class SubmissionQueue:
+    def __init__(self, client, path=QUEUE_DB_PATH, batch_size=FLUSH_BATCH_SIZE, interval=FLUSH_INTERVAL,
+                 on_conflict=CONFLICT_KEY):
+        self.client = client
+        self.on_conflict = on_conflict
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.last_error = None  # 送信スレッドで直近に起きたエラー（送信できた回は None に戻す）
+
+        self._execute("PRAGMA journal_mode=WAL")
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                dedupe_key TEXT UNIQUE,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        if "version" not in [row[1] for row in self._execute("PRAGMA table_info(pending)")]:
+            self._execute("ALTER TABLE pending ADD COLUMN version INTEGER NOT NULL DEFAULT 0")  # 以前のキューのファイル
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id INTEGER PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                failed_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                dedupe_key TEXT
+            )
+        """)
+
+    def _execute(self, sql, params=()):
+        return self._execute_all([(sql, params)])
+
+    # --- 複数の文を1つのトランザクションで実行（最後の文の結果を返す） ---
+    def _execute_all(self, statements):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA synchronous=FULL")  # 受付完了を返す前に確実にディスクへ書く
+            rows = []
+            with conn:
+                for sql, params in statements:
+                    rows = conn.execute(sql, params).fetchall()
+            return rows
+        finally:
+            conn.close()
+
+    # --- 回答をキューに積む（同じ冪等キーの未送信があれば内容を置き換える） ---
+    # 置き換えるたびに version を上げる。送信中の行が置き換えられた場合、送信後の削除は version が
+    # 一致しないので行わず、新しい内容を次の送信で送る。
+    def enqueue(self, record):
+        self._execute(
+            "INSERT INTO pending (payload, created_at, dedupe_key) VALUES (?, ?, ?) "
+            "ON CONFLICT(dedupe_key) DO UPDATE SET payload = excluded.payload, version = version + 1, "
+            "attempts = 0, last_error = NULL",
+            (json.dumps(record, ensure_ascii=False, default=str), time.time(), record.get(self.on_conflict))
+        )
+        self._wakeup.set()
+
+    # --- rows（(id, version, payload) のリスト）を送り、成功・拒否・失敗に振り分ける ---
+    # 拒否されたバッチは半分ずつに分けて送り直し、拒否される行だけを絞り込む（n 行中1行なら約 2*log2(n) 回）
+    def _send(self, rows, done, rejected, failed):
+        if failed:
+            failed.append((rows, failed[0][1]))  # 接続エラーなどの間は残りを送らない
+            return
+        results = self.client.bulk_insert([json.loads(row[2]) for row in rows], on_conflict=self.on_conflict)
+        for r in results:
+            batch = rows[r["start"]:r["start"] + r["count"]]
+            if r["ok"]:
+                done.extend(batch)
+            elif r.get("code") not in REJECTED_STATUS:
+                failed.append((batch, r["status"]))
+            elif len(batch) == 1:
+                rejected.append((batch[0], r["status"]))
+            else:
+                half = len(batch) // 2
+                self._send(batch[:half], done, rejected, failed)
+                self._send(batch[half:], done, rejected, failed)
+
+    # --- キューを Supabase へ送る（送信件数とエラーを返す） ---
+    def flush(self):
+        with self._flush_lock:
+            sent = 0
+            while True:
+                rows = self._execute("SELECT id, version, payload FROM pending ORDER BY id LIMIT ?", (self.batch_size,))
+                if not rows:
+                    return sent, None
+                done, rejected, failed = [], [], []
+                self._send(rows, done, rejected, failed)
+                if done:
+                    self._execute_all([("DELETE FROM pending WHERE id = ? AND version = ?", row[:2]) for row in done])
+                    sent += len(done)
+                if rejected:
+                    now = time.time()
+                    statements = []
+                    for row, error in rejected:
+                        statements.append((
+                            "INSERT INTO dead_letter (id, payload, created_at, failed_at, attempts, last_error, dedupe_key) "
+                            "SELECT id, payload, created_at, ?, attempts + 1, ?, dedupe_key FROM pending WHERE id = ? AND version = ?",
+                            (now, error, *row[:2])
+                        ))
+                        statements.append(("DELETE FROM pending WHERE id = ? AND version = ?", row[:2]))
+                    self._execute_all(statements)
+                if failed:
+                    error = failed[0][1]
+                    ids = [row[0] for batch, _ in failed for row in batch]
+                    self._execute(
+                        f"UPDATE pending SET attempts = attempts + 1, last_error = ? WHERE id IN ({','.join('?' * len(ids))})",
+                        (error, *ids)
+                    )
+                    return sent, error
+
+    # --- キューの状態（件数・最古の待ち時間・直近のエラー・送信できずに退避した件数） ---
+    def stats(self):
+        depth, oldest = self._execute("SELECT COUNT(*), MIN(created_at) FROM pending")[0]
+        last_error = self._execute(
+            "SELECT last_error FROM pending WHERE last_error IS NOT NULL ORDER BY id LIMIT 1"
+        )
+        dead, dead_error = self._execute(
+            "SELECT COUNT(*), (SELECT last_error FROM dead_letter ORDER BY failed_at DESC LIMIT 1) FROM dead_letter"
+        )[0]
+        return {
+            "depth": depth,
+            "oldest_age": time.time() - oldest if oldest else 0.0,
+            "last_error": last_error[0][0] if last_error else self.last_error,
+            "dead_letters": dead,
+            "dead_letter_error": dead_error
+        }
+
+    # --- バックグラウンド送信 ---
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="submission-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        backoff = self.interval
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                _, error = self.flush()
+            except Exception as e:  # SQLite・接続・応答の解析などのエラーでもスレッドを止めず、待ってから再送する
+                error = f"{type(e).__name__}: {e}"
+            self.last_error = error
+            if error:
+                time.sleep(backoff)  # 失敗が続く間は指数的に間隔を空ける
+                backoff = min(backoff * 2, MAX_BACKOFF)
+            else:
+                backoff = self.interval
+
+
+# --- プロセス全体で1つのキューと送信スレッドを共有 ---
+@st.cache_resource
+def get_submission_queue():
+    queue = SubmissionQueue(
+        get_supabase_client(),
+        path=st.secrets.get("queue_db_path", QUEUE_DB_PATH),
+        batch_size=int(st.secrets.get("queue_batch_size", FLUSH_BATCH_SIZE)),
+        interval=float(st.secrets.get("queue_flush_interval", FLUSH_INTERVAL))
+    )
+    queue.start()
+    return queue
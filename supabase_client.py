@@ -0,0 +1,219 @@
+import json
+import unicodedata
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Supabase REST 共通クライアント ---
+# survey2/5/6 の送信・取得・更新はすべてここを通す。
+# Session を使い回すことで、起床時の送信ラッシュでも TCP+TLS の接続を再利用できる。
+TABLE_NAME = "condition"
+CONFLICT_KEY = "submission_key"  # migrations/001_condition_submission_key.sql の一意キー
+
+DEFAULT_TIMEOUT = (3.05, 15)  # (接続, 読み込み) 秒
+INSERT_BATCH_SIZE = 500
+INSERT_BATCH_BYTES = 1_000_000  # 1リクエストあたりの本文サイズの上限（目安）
+RETRY_STATUS = (500, 502, 503, 504)
+
+# --- サーバー側の集計（migrations/003_condition_aggregates.sql） ---
+DAILY_COUNTS_VIEW = "condition_daily_team_counts"    # 日付×所属ごとの回答数
+ATHLETE_AVERAGES_RPC = "condition_athlete_averages"  # 期間内の選手ごとの平均
+
+
+class SupabaseClient:
+    def __init__(self, url, key, table=TABLE_NAME, timeout=DEFAULT_TIMEOUT,
+                 retries=3, backoff_factor=0.5, pool_size=10):
+        self.base_url = f"{url.rstrip('/')}/rest/v1"
+        self.table = table
+        self.timeout = timeout
+
+        # 5xx と接続エラーは指数バックオフで最大 retries 回まで再試行（0.5秒→1秒→2秒）
+        # 読み込みのタイムアウトは「サーバーでは書けている」ことがあるので、upsert のように
+        # 何度送っても結果が同じリクエストだけ再試行する。ただの追加（on_conflict なし）は再試行しない（二重に書かないため）
+        self.session = self._make_session(key, pool_size, Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=None,  # POST/PATCH も再試行の対象にする
+            raise_on_status=False
+        ))
+        self.insert_session = self._make_session(key, pool_size, Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=None,
+            raise_on_status=False
+        ))
+
+    def _make_session(self, key, pool_size, retry):
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json"
+        })
+        return session
+
+    # path を省略するとテーブル（condition）、ビューや "rpc/関数名" を指定するとそちらに送る
+    # idempotent=False のリクエストは読み込みのタイムアウトで再送しない
+    def request(self, method, params=None, path=None, idempotent=True, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session if idempotent else self.insert_session
+        return session.request(method, f"{self.base_url}/{path or self.table}", params=params, **kwargs)
+
+    # --- 行の追加（on_conflict を指定すると一意キーで upsert する） ---
+    def insert(self, records, prefer="return=minimal", on_conflict=None):
+        params = None
+        if on_conflict:
+            params = {"on_conflict": on_conflict}
+            prefer = f"resolution=merge-duplicates,{prefer}"
+        return self.request("POST", params=params, idempotent=bool(on_conflict), json=records, headers={"Prefer": prefer})
+
+    # --- 複数行の一括追加（件数・サイズで区切った配列を1リクエストずつ POST） ---
+    # 結果はバッチごとに {"start": 先頭の位置, "count": 件数, "ok": bool, "status": ..., "code": HTTP ステータス} を返す
+    # （接続エラーなどで応答がない場合、code は None）
+    # upsert する場合、同じバッチ内に同じキーの行が2つあると Postgres が拒否するので呼び出し側で重複を除くこと
+    def bulk_insert(self, records, batch_size=INSERT_BATCH_SIZE, max_batch_bytes=INSERT_BATCH_BYTES, on_conflict=None):
+        results = []
+        for start, batch in split_batches(records, batch_size, max_batch_bytes):
+            try:
+                res = self.insert(batch, on_conflict=on_conflict)
+                ok = res.status_code == 201
+                results.append({"start": start, "count": len(batch), "ok": ok, "code": res.status_code,
+                                "status": res.status_code if ok else f"{res.status_code} {res.text[:200]}"})
+            except requests.RequestException as e:
+                results.append({"start": start, "count": len(batch), "ok": False, "code": None, "status": str(e)})
+        return results
+
+    # --- 行の取得（source にビュー名を渡すとビューから取得） ---
+    def select(self, params, source=None):
+        return self.request("GET", params=params, path=source)
+
+    # --- 列の型（PostgREST の OpenAPI 定義の format: "bigint"、"date" など）。取得できなければ空 ---
+    def column_formats(self):
+        try:
+            res = self.session.get(f"{self.base_url}/", headers={"Accept": "application/openapi+json"}, timeout=self.timeout)
+            res.raise_for_status()
+            properties = res.json().get("definitions", {}).get(self.table, {}).get("properties", {})
+        except (requests.RequestException, ValueError):
+            return {}
+        return {name: prop.get("format", "") for name, prop in properties.items()}
+
+    # --- RPC（Postgres の関数）の呼び出し。params で結果の列や行を絞り込める ---
+    def rpc(self, function, args=None, params=None):
+        return self.request("POST", params=params, path=f"rpc/{function}", json=args or {})
+
+    # --- 日付×所属ごとの回答数（集計はサーバー側のビューで行い、集計結果だけを受け取る） ---
+    def daily_counts(self, date_from=None, date_to=None, teams=None):
+        params = dict(build_filters(date_from=date_from, date_to=date_to, teams=teams), order="date.desc,team.asc")
+        res = self.select(params, source=DAILY_COUNTS_VIEW)
+        res.raise_for_status()
+        return res.json()
+
+    # --- 期間内の選手ごとの平均（RPC。所属はクエリで絞り込む） ---
+    def athlete_averages(self, date_from=None, date_to=None, teams=None, columns=None):
+        params = dict(build_filters(columns=columns, teams=teams), order="team.asc,name.asc")
+        res = self.rpc(ATHLETE_AVERAGES_RPC, {"date_from": date_from, "date_to": date_to}, params)
+        res.raise_for_status()
+        return res.json()
+
+    # --- キーセットページング（id=gt.最終id）で1ページずつ取得 ---
+    # PostgREST の max-rows で件数が切り詰められても取りこぼさないよう、空ページが返るまで続ける。
+    # offset と違い、途中で exported=true に更新された行があってもずれない。
+    # after_id を渡すと、その id より後の行から取得する（差分同期用）。
+    def iter_pages(self, params, page_size=1000, after_id=None):
+        last_id = after_id
+        while True:
+            page_params = dict(params, order="id.asc", limit=page_size)
+            if last_id is not None:
+                page_params["id"] = f"gt.{last_id}"
+            res = self.select(page_params)
+            res.raise_for_status()
+            rows = res.json()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    # --- 行の更新 ---
+    def update(self, params, values, prefer="return=minimal"):
+        return self.request("PATCH", params=params, json=values, headers={"Prefer": prefer})
+
+    # --- exported=true への一括更新（id=in.(...) をチャンク単位で送信） ---
+    def mark_exported(self, ids, chunk_size=100):
+        results = []  # チャンクごとの結果 {"ids": [...], "ok": bool, "status": ...}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            id_list = ",".join(str(record_id) for record_id in chunk)
+            try:
+                res = self.update({"id": f"in.({id_list})"}, {"exported": True})
+                results.append({"ids": chunk, "ok": res.status_code in (200, 204), "status": res.status_code})
+            except requests.RequestException as e:
+                results.append({"ids": chunk, "ok": False, "status": str(e)})
+        return results
+
+
+# --- 冪等キー（日付＋所属＋名前） ---
+# 全角/半角や空白の違いを吸収し、同じ日の同じ選手の送信が同じキーになるようにする
+def make_submission_key(record):
+    parts = [unicodedata.normalize("NFKC", str(record.get(field, ""))) for field in ("date", "team", "name")]
+    return "|".join("".join(part.split()).lower() for part in parts)
+
+
+# --- PostgREST の取得条件（取得する列・日付の範囲・所属）を組み立てる ---
+def build_filters(columns=None, date_from=None, date_to=None, teams=None):
+    params = {}
+    if columns:
+        params["select"] = ",".join(columns)
+    dates = []
+    if date_from:
+        dates.append(f"date.gte.{date_from}")
+    if date_to:
+        dates.append(f"date.lte.{date_to}")
+    if dates:
+        params["and"] = f"({','.join(dates)})"
+    if teams:
+        params["team"] = f"in.({','.join(quote_value(team) for team in teams)})"
+    return params
+
+
+# --- in.(...) の中の値（カンマや括弧を含む所属名でも1つの値として扱われるように引用符で囲む） ---
+def quote_value(value):
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+# --- レコードを件数とJSONサイズの上限で区切る（(先頭の位置, バッチ) を順に返す） ---
+def split_batches(records, batch_size, max_batch_bytes):
+    batch, batch_bytes, start = [], 2, 0
+    for i, record in enumerate(records):
+        size = len(json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")) + 1
+        if batch and (len(batch) >= batch_size or batch_bytes + size > max_batch_bytes):
+            yield start, batch
+            batch, batch_bytes, start = [], 2, i
+        batch.append(record)
+        batch_bytes += size
+    if batch:
+        yield start, batch
+
+
+# --- プロセス全体で1つだけ生成してセッション間で共有 ---
+@st.cache_resource
+def get_supabase_client():
+    return SupabaseClient(
+        st.secrets["supabase_url"],
+        st.secrets["supabase_key"],
+        timeout=(float(st.secrets.get("supabase_connect_timeout", DEFAULT_TIMEOUT[0])),
+                 float(st.secrets.get("supabase_read_timeout", DEFAULT_TIMEOUT[1]))),
+        retries=int(st.secrets.get("supabase_retries", 3))
+    )
@@ -1,258 +1,193 @@
-import streamlit as st
-import requests
-from datetime import date
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
-# --- Supabase 接続情報 ---
-SUPABASE_URL = st.secrets["supabase_url"]
-SUPABASE_KEY = st.secrets["supabase_key"]
-TABLE_NAME = "condition"
-
-# --- Supabaseにデータ送信 ---
-def submit_to_supabase(data_dict):
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    }
-    data_dict["exported"] = False  # 新規は未出力とする
-    response = requests.post(
-        f"{SUPABASE_URL}/rest/v1/{TABLE_NAME}",
-        json=data_dict,  # リストではなく辞書を直接送信
-        headers=headers
-    )
-    if response.status_code != 201:
-        st.error(f"❌ Supabaseへの送信に失敗しました: {response.status_code} {response.text}")
-        return False
-    return True
-
-# --- Supabaseから未出力データ取得 ---
-def fetch_unexported_data():
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}"
-    }
-    url = f"{SUPABASE_URL}/rest/v1/{TABLE_NAME}?exported=eq.false&select=*"
-    res = requests.get(url, headers=headers)
-    return pd.DataFrame(res.json())
-
-# --- Supabaseのデータをexported=trueに更新 ---
-def mark_as_exported(ids):
-    if not ids:
-        return
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    }
-    for record_id in ids:
-        url = f"{SUPABASE_URL}/rest/v1/{TABLE_NAME}?id=eq.{record_id}"
-        requests.patch(url, headers=headers, json={"exported": True})
-
-# --- Googleスプレッドシート出力 ---
-SPREADSHEET_NAME = "2025年度_起床時コンディションチェック（実業団・NF）"
-SHEET_NAME = "condition2025"
-
-def export_to_gsheet(df):
-    df = df.fillna("")
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds_dict = st.secrets["google_service_account"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
-    sheet = client.open(SPREADSHEET_NAME).worksheet(SHEET_NAME)
-
-    existing_data = sheet.get_all_values()
-    if not existing_data:
-        sheet.insert_row(df.columns.tolist(), 1)  # ヘッダーがない場合のみ追加
-
-    sheet.append_rows(df.values.tolist())
-
-# --- スライダー（数値非表示）関数 ---
-def secret_slider_with_labels(title, left_label, right_label, key, min_value=0, max_value=100, default=50):
-    st.markdown(f"**{title}**")
-    value = st.select_slider(
-        label=" ",
-        options=list(range(min_value, max_value + 1)),
-        value=default,
-        format_func=lambda x: "",
-        key=key,
-        label_visibility="collapsed"
-    )
-    st.markdown(f"<div style='display: flex; justify-content: space-between;'><span>{left_label}</span><span>{right_label}</span></div>", unsafe_allow_html=True)
-    return value
-    
-# --- ping監視対応（UptimeRobotなど） ---
-query_params = st.query_params
-if query_params.get("ping", ["0"])[0] == "1":
-    st.write("pong")  # 応答確認用
-    st.stop()         # それ以上の処理を止める
-    
-# --- 送信完了フラグ初期化 ---
-if "submitted" not in st.session_state:
-    st.session_state["submitted"] = False
-
-# --- 管理者判定 ---
-query_params = st.query_params
-is_admin = query_params.get("admin", ["0"])[0] == "1"
-
-# ========================
-# 管理者ページ（?admin=1）
-# ========================
-if is_admin:
-    st.title("🛠 管理者メニュー（未出力データ → スプレッドシート）")
-    admin_pass = st.text_input("管理者パスワードを入力", type="password", key="admin_password_input")
-
-    if admin_pass == st.secrets.get("admin_password"):
-        if st.button("📤 未出力データを出力する"):
-            df = fetch_unexported_data()
-            if df.empty:
-                st.warning("⚠ 未出力データはありません")
-            else:
-                export_to_gsheet(df.drop(columns=["exported"]))
-                mark_as_exported(df["id"].tolist())
-                st.success(f"✅ {len(df)} 件のデータを出力し、exported=true に更新しました！")
-    elif admin_pass:
-        st.error("❌ パスワードが間違っています")
-        
-# ========================
-# 一般ユーザー用ページ
-# ========================
-if not is_admin:
-    st.title("コンディション記録")
-
-    if not st.session_state["submitted"]:
-        date_val = st.date_input("**1. 日付**", value=date.today(), key="date")
-        st.caption(" ")
-
-        st.markdown("**2. 所属**")
-        team = st.text_input("hidden", key="team", label_visibility="collapsed")
-        st.caption(" ")
-
-        st.markdown("**3. 名前**")
-        name = st.text_input("hidden", key="name", label_visibility="collapsed")
-        st.caption("※ フルネームで入力してください")
-
-        health_condition = secret_slider_with_labels("4. 全般的体調", "とても良い", "とても悪い", "health")
-        st.caption(" ")
-
-        fatigue = secret_slider_with_labels("5. 疲労感", "全くない", "とても強い", "fatigue")
-        st.caption(" ")
-
-        st.markdown("**6. 睡眠時間（例：7時間15分→7.25、7時間30分→7.5）**")
-        sleep_time = st.number_input("hidden", 0.0, 24.0, step=0.1, key="sleep_time", label_visibility="collapsed")
-        st.caption("※手入力もできます")
-
-        sleep_quality = secret_slider_with_labels("7. 睡眠の深さ", "とても浅い", "とても深い", "sleep_quality")
-        st.caption(" ")
-
-        st.markdown("**8. 睡眠状況（複数選択）**")
-        sleep_issues = st.multiselect("hidden", [
-            "夢を見た", "何回も目覚めた", "何回もトイレに行った", "寝汗をかいた", "寝付けなかった", "普段より寝付けなかった", "特になし"], key="sleep_issues", label_visibility="collapsed")
-        st.caption(" ")
-
-        appetite = secret_slider_with_labels("9. 食欲", "全く無い", "とてもある", "appetite")
-        st.caption(" ")
-
-        injury = st.radio("**10. 故障・怪我の有無**", ["無", "有"], key="injury")
-        st.caption(" ")
-
-        st.markdown("**11. 故障・怪我の箇所**")
-        injury_part = st.text_input("hidden", key="injury_part", label_visibility="collapsed") if injury == "有" else ""
-        st.caption("※ 故障・怪我がある場合は部位を具体的に入力してください（例：右足首）")
-
-        injury_severity = secret_slider_with_labels("12. 故障・怪我の程度", "全くない", "練習ができない", "injury_severity")
-        st.caption(" ")
-
-        training_intensity = secret_slider_with_labels("13. 練習強度", "非常に楽", "非常にきつい", "training_intensity")
-        st.caption(" ")
-
-        bowel_movement = st.radio("**14. 前日の排便の有無**", ["有", "無"], key="bowel_movement")
-        st.caption(" ")
-
-        st.image("stool_chart.png", caption="便の形（1～7）", use_container_width=True)
-
-        st.markdown("**15. 前日の便の形**")
-        bowel_shape = st.selectbox("上記画像を参考に該当する番号を選択してください", list(range(1, 8)), key="bowel_shape") if bowel_movement == "有" else ""
-        st.caption("※ 画像を参考に選択")
-
-        running_distance = st.number_input("**16. 前日の走行距離（km）**", 0.0, 100.0, step=0.1, key="running_distance")
-        st.caption("※手入力もできます")
-
-        spo2 = st.number_input("**17. SpO2（％）**", 70, 100, key="spo2")
-        st.caption("※手入力もできます")
-
-        pulse = st.number_input("**18. 脈拍数（拍/分）**", 30, 200, key="pulse")
-        st.caption("※手入力もできます")
-
-        temperature = st.number_input("**19. 体温（℃）**", 34.0, 42.0, step=0.1, key="temperature")
-        st.caption("※手入力もできます")
-
-        weight = st.number_input("**20. 体重（kg）**", 20.0, 150.0, step=0.1, key="weight")
-        st.caption("※手入力もできます")
-
-        symptoms = st.multiselect("**21. 特記事項（複数選択）**", [
-            "特になし", "咳", "鼻水", "頭痛", "息苦しさ", "下痢", "喉の痛み", "悪寒",
-            "腹痛", "熱感", "倦怠感", "吐き気", "痰", "月経", "月経痛（腰痛・下腹部痛等）", "月経前不調（腰痛やむくみ、体重増加）", "不正出血", "服薬", "その他"], key="symptoms")
-        st.caption("※特にない場合は、「特になし」を選択してください")
-
-        other_symptoms = st.text_input("21-1. その他の症状", key="other_symptoms") if "その他" in symptoms else ""
-        if "その他" in symptoms:
-            st.caption(" ")
-
-        options = [None] + list(range(0, 301))
-        exercise_time = st.selectbox("**22. 前日のトレーニング時間（分） ※手入力もできます**",
-                                     options=options,
-                                     format_func=lambda x: "入力してください" if x is None else f"{x} 分",
-                                     key="exercise_time")
-        st.caption("※ウォームアップおよびクールダウンの時間は含めなくて大丈夫です")
-
-
-        st.image("rpe_chart.png", caption="運動のきつさ（0～10）", use_container_width=True)
-        rpe_options = [None] + list(range(0,11))
-        exercise_rpe = st.selectbox("**23. 前日の運動のきつさ（RPE）**", 
-                                    options = rpe_options,
-                                    format_func=lambda x: "入力してください" if x is None else str(x),
-                                    key="exercise_rpe")
-        st.caption("※上記画像を参考に運動のきつさ（RPE）を入力してください")
-
-        if st.button("送信"):
-            if not team or not name:
-                st.error("❗ 所属と名前を入力してください")
-            elif injury == "有" and not injury_part:
-                st.error("❗ 11. 故障の箇所を入力してください")
-            elif not symptoms:
-                st.error("❗21. 特記事項を選択してください")
-            elif "その他" in symptoms and not other_symptoms:
-                st.error("❗ 21-1. その他の症状を入力してください")
-            elif exercise_time is None:
-                st.error("❗ 22. トレーニング時間（分）を入力してください")
-            elif exercise_rpe is None:
-                st.error("❗23. 運動のきつさ（RPE）を入力してください")
-            else:
-                data = {
-                    "date": str(date_val), "team": team, "name": name,
-                    "health": health_condition, "fatigue": fatigue,
-                    "sleep_time": sleep_time, "sleep_quality": sleep_quality,
-                    "sleep_issues": ", ".join(sleep_issues), "appetite": appetite,
-                    "injury": injury, "injury_part": injury_part,
-                    "injury_severity": injury_severity, "training_intensity": training_intensity,
-                    "bowel_movement": bowel_movement, "bowel_shape": bowel_shape,
-                    "running_distance": running_distance, "spo2": spo2, "pulse": pulse,
-                    "temperature": temperature, "weight": weight,
-                    "symptoms": ", ".join(symptoms), "other_symptoms": other_symptoms,
-                    "exercise_time": exercise_time, "exercise_rpe": exercise_rpe
-                }
-                if submit_to_supabase(data):
-                    st.session_state["submitted"] = True
-                    st.rerun()
-                else:
-                    st.error("❌ Supabaseへの送信に失敗しました。")
-    else:
-        st.success("✅ 回答ありがとうございました！")
-        st.balloons()
-        st.markdown("本日もよろしくお願いします！")
-
-
-
+import time
+import streamlit as st
+from healthcheck import handle_ping
+
+SCRIPT_START = time.perf_counter()  # ?debug=1 で表示する再実行時間の計測開始
+
+# --- ping監視対応（UptimeRobotなど）: 重い import や secrets の読み込みより前に応答する ---
+handle_ping()
+
+import requests
+from supabase_client import get_supabase_client
+from admin_export import storage_backend, resume_write_behind, submit_record, render_queue_status, render_export
+from questionnaire import load_questionnaire, render_questionnaire, submit_questionnaire, build_record
+from i18n import detect_language, get_messages
+
+# --- 表示言語（?lang=ja / ?lang=en、指定がなければブラウザの言語）。日本語版・英語版を1つのアプリで配信する ---
+messages = get_messages(detect_language())
+
+# --- 回答の保存・送信キュー・スプレッドシート出力は survey2 と共通（admin_export.py） ---
+STORAGE_BACKEND = storage_backend()
+resume_write_behind()
+
+# --- ローカルの読み取り用コピー（read_model.py）を管理者ページの分析に使うか ---
+READ_MODEL = bool(st.secrets.get("read_model", False)) and STORAGE_BACKEND == "supabase"
+
+# --- サーバー側の集計（ビュー・RPC の集計結果だけを受け取る。管理者ページ用） ---
+@st.cache_data(ttl=300)
+def fetch_daily_counts(date_from, date_to):
+    return get_supabase_client().daily_counts(str(date_from), str(date_to))
+
+@st.cache_data(ttl=300)
+def fetch_athlete_averages(date_from, date_to, teams):
+    return get_supabase_client().athlete_averages(str(date_from), str(date_to), list(teams))
+
+# --- Googleスプレッドシート出力 ---
+SPREADSHEET_NAME = "2025年度_起床時コンディションチェック（実業団・NF）"
+SHEET_NAME = "condition2025"
+SPREADSHEET_KEY = st.secrets.get("spreadsheet_key")  # 設定されていれば名前検索せずキーで開く
+
+# --- 入力モード（フォームモードでは入力のたびに再実行しない。?form=0 で従来の逐次モード） ---
+FORM_MODE = st.query_params.get("form", "1" if st.secrets.get("form_mode", True) else "0") != "0"
+DEBUG_RERUNS = st.query_params.get("debug") == "1"  # ?debug=1 で再実行回数と時間を表示
+
+# --- 送信完了フラグ初期化 ---
+if "submitted" not in st.session_state:
+    st.session_state["submitted"] = False
+if "submit_error" not in st.session_state:
+    st.session_state["submit_error"] = None
+if "field_errors" not in st.session_state:
+    st.session_state["field_errors"] = {}  # 入力欄ごとのエラー（質問の key → メッセージ）
+
+# --- 管理者判定 ---
+query_params = st.query_params
+is_admin = query_params.get("admin", ["0"])[0] == "1"
+
+# ========================
+# 管理者ページ（?admin=1）
+# ========================
+if is_admin:
+    import pandas as pd  # 管理者ページでしか使わないライブラリはここで読み込む
+    import os
+    from datetime import date, timedelta
+
+    st.title("🛠 管理者メニュー（未出力データ → スプレッドシート）")
+    admin_pass = st.text_input("管理者パスワードを入力", type="password", key="admin_password_input")
+
+    if admin_pass == st.secrets.get("admin_password"):
+        render_queue_status()
+        render_export(SPREADSHEET_NAME, SHEET_NAME, SPREADSHEET_KEY)
+
+        # --- ローカルの読み取り用コピー（差分同期・全件再同期） ---
+        if READ_MODEL:
+            from read_model import get_read_model
+            model_status = get_read_model().status()
+            since_sync = model_status["since_sync"]
+            st.caption(f"🗄 ローカルコピー: {model_status['rows']} 件（id ≦ {model_status['watermark']}、"
+                       + (f"最終同期: {since_sync:.0f} 秒前）" if since_sync is not None else "未同期）"))
+            sync_col, resync_col = st.columns(2)
+            sync_clicked = sync_col.button("🗄 差分を同期する")
+            resync_clicked = resync_col.button("🗄 全件を再同期する")  # ウォーターマークが壊れた・更新を取り込みたいとき
+            if sync_clicked or resync_clicked:
+                try:
+                    result = get_read_model().resync() if resync_clicked else get_read_model().sync()
+                    st.info(f"{result['pulled']} 件を取り込みました（{result['seconds']:.1f} 秒、残りの遅れ: id {result['lag_ids']} 件分）")
+                except requests.RequestException as e:
+                    st.error(f"❌ Supabaseからの取得に失敗しました: {e}")
+
+        # --- ここから下は Supabase のビュー・RPC・ページ取得を使うので、保存先が Supabase のときだけ表示する ---
+        if STORAGE_BACKEND == "supabase":
+            # --- 回答状況（日付×所属の回答数・選手ごとの平均） ---
+            st.subheader("📈 回答状況")
+            if st.toggle("回答状況を表示する"):
+                period = st.date_input("期間", (date.today() - timedelta(days=29), date.today()))
+                if len(period) == 2:  # 終了日を選ぶまでは取得しない
+                    try:
+                        counts = pd.DataFrame(fetch_daily_counts(*period), columns=["date", "team", "submissions", "athletes"])
+                        teams = st.multiselect("所属", sorted(counts["team"].dropna().unique()))
+                        if teams:
+                            counts = counts[counts["team"].isin(teams)]
+                        averages = pd.DataFrame(fetch_athlete_averages(*period, tuple(teams)))
+                    except requests.RequestException as e:
+                        counts = None
+                        st.error(f"❌ Supabaseからの取得に失敗しました: {e}")
+                    if counts is not None and counts.empty:
+                        st.warning("⚠ この期間の回答はありません")
+                    elif counts is not None:
+                        st.bar_chart(counts.pivot_table(index="date", columns="team", values="submissions", aggfunc="sum"))
+                        st.dataframe(averages, hide_index=True)
+
+            # --- ダウンロード（期間・所属で絞った行を CSV / Parquet で。ページ単位で一時ファイルに書き出す） ---
+            st.subheader("⬇ ダウンロード")
+            if st.toggle("ダウンロードファイルを作成する"):
+                from downloads import build_download, remove_stale_downloads, FORMATS
+                remove_stale_downloads()  # 閉じられたセッションが残した古いファイルを消す
+                dl_period = st.date_input("期間", (date.today() - timedelta(days=29), date.today()), key="download_period")
+                dl_teams = st.text_input("所属（カンマ区切り。空欄ならすべて）", key="download_teams")
+                dl_format = st.radio("形式", list(FORMATS), horizontal=True, key="download_format")
+                if len(dl_period) == 2 and st.button("📦 ファイルを作成する"):
+                    previous = st.session_state.pop("download", None)
+                    if previous and os.path.exists(previous["path"]):
+                        os.remove(previous["path"])  # 前回作成した一時ファイルは残さない
+                    try:
+                        teams = [team.strip() for team in dl_teams.split(",") if team.strip()]
+                        path, count = build_download(dl_format, str(dl_period[0]), str(dl_period[1]), teams)
+                        st.session_state["download"] = {
+                            "path": path, "count": count, "format": dl_format,
+                            "file_name": f"condition_{dl_period[0]}_{dl_period[1]}.{dl_format}"
+                        }
+                    except requests.RequestException as e:
+                        st.error(f"❌ Supabaseからの取得に失敗しました: {e}")
+                download = st.session_state.get("download")
+                if download and download["count"] == 0:
+                    st.warning("⚠ この条件のデータはありません")
+                elif download and os.path.exists(download["path"]):
+                    with open(download["path"], "rb") as f:
+                        st.download_button(f"⬇ {download['file_name']}（{download['count']} 件）", f,
+                                           file_name=download["file_name"], mime=FORMATS[download["format"]])
+
+            # --- トレーニング負荷（sRPE・ACWR・monotony・strain） ---
+            st.subheader("📊 トレーニング負荷")
+            if st.toggle("トレーニング負荷を表示する"):
+                from analytics import load_training_metrics, latest_row_id, latest_by_athlete, ACWR_ALERT
+                try:
+                    if READ_MODEL:
+                        sync = get_read_model().sync()  # 新しい行だけを取り込んでからローカルで計算する
+                        metrics = load_training_metrics(sync["watermark"], local=True)
+                    else:
+                        metrics = load_training_metrics(latest_row_id())  # 新しい行が入るまではキャッシュを使う
+                except requests.RequestException as e:
+                    metrics = None
+                    st.error(f"❌ Supabaseからの取得に失敗しました: {e}")
+                if metrics is not None and metrics.empty:
+                    st.warning("⚠ トレーニングの記録がありません")
+                elif metrics is not None:
+                    latest = latest_by_athlete(metrics)
+                    alerts = int((latest["acwr"] > ACWR_ALERT).sum())
+                    st.caption(f"各選手の最新日の値（ACWR が {ACWR_ALERT} を超える選手: {alerts} 人）")
+                    st.dataframe(latest, hide_index=True)
+                    athlete = st.selectbox("選手", list(zip(latest["team"], latest["name"])),
+                                           format_func=lambda a: f"{a[0]} / {a[1]}")
+                    history = metrics[(metrics["team"] == athlete[0]) & (metrics["name"] == athlete[1])].set_index("date")
+                    st.line_chart(history[["load", "acute_load", "chronic_load"]])
+                    st.line_chart(history[["acwr", "monotony"]])
+    elif admin_pass:
+        st.error("❌ パスワードが間違っています")
+        
+# ========================
+# 一般ユーザー用ページ
+# ========================
+if not is_admin:
+    questionnaire = load_questionnaire()
+    st.title(messages["title"])
+
+    if not st.session_state["submitted"]:
+        # 質問は questionnaire.json から描画する（フォームモードでは「送信」を押したときに1回だけ再実行）
+        # 送信は on_click で行い（送信中・送信済みのクリックは無視する）、この回の描画で結果を表示する
+        submit = lambda values: submit_record(build_record(questionnaire, values), messages)
+        render_questionnaire(questionnaire, messages, FORM_MODE, debug=DEBUG_RERUNS,
+                             on_click=lambda: submit_questionnaire(questionnaire, messages, submit))
+
+        if st.session_state["submit_error"]:
+            st.error(st.session_state["submit_error"])
+
+        if DEBUG_RERUNS:
+            script_runs = st.session_state["script_runs"] = st.session_state.get("script_runs", 0) + 1
+            st.caption(f"🔁 ページ全体: {script_runs} 回目 / {(time.perf_counter() - SCRIPT_START) * 1000:.1f} ms")
+    else:
+        st.success(messages["thanks"])
+        st.balloons()
+        st.markdown(messages["thanks_note"])
+
+
+
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+import pytest
+
+# --- テスト共通（リポジトリ直下のモジュールと benchmarks/ の偽の PostgREST を使う） ---
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from bench_startup import FakePostgrest, start_fake_backend, stub_secrets  # noqa: E402
+
+
+# テストごとに新しい偽の PostgREST を立てる（受け取ったリクエストは postgrest.received）
+@pytest.fixture
+def postgrest():
+    class Handler(FakePostgrest):
+        received = []
+
+    Handler.url = start_fake_backend(Handler)
+    return Handler
+
+
+# 偽の PostgREST に向けた secrets で survey*.py を AppTest で動かす
+@pytest.fixture
+def app(postgrest, monkeypatch):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.chdir(ROOT)  # 画像などの相対パスをアプリと同じにする
+    st.cache_resource.clear()  # 前のテストの偽の PostgREST に向いたクライアントを使い回さない
+    st.cache_data.clear()
+
+    def load(script, **secrets):
+        at = AppTest.from_file(str(ROOT / script), default_timeout=60)
+        for key, value in dict(stub_secrets(postgrest.url), **secrets).items():
+            at.secrets[key] = value
+        return at
+
+    return load
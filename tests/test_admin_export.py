@@ -0,0 +1,49 @@
+import pytest
+
+# --- 管理者ページ：survey2 / survey6 は同じ出力画面（admin_export.py）を使う ---
+@pytest.mark.parametrize("script", ["survey2.py", "survey6.py"])
+def test_admin_page_shows_shared_export(app, script):
+    at = app(script)
+    at.query_params["admin"] = "1"
+    at.run()
+    at.text_input(key="admin_password_input").input("bench-password").run()
+
+    assert not at.exception
+    labels = [b.label for b in at.button]
+    assert "📤 未出力データを出力する" in labels and "🔄 Google認証をリセット" in labels
+
+
+def test_admin_page_skips_export_for_csv(app, tmp_path):
+    at = app("survey6.py", storage_backend="csv", csv_path=str(tmp_path / "condition.csv"))
+    at.query_params["admin"] = "1"
+    at.run()
+    at.text_input(key="admin_password_input").input("bench-password").run()
+
+    assert not at.exception
+    assert "📤 未出力データを出力する" not in [b.label for b in at.button]
+    assert at.info[0].value.endswith("保存先（csv）は exported を管理しないため、出力は行いません")
+
+
+# --- 出力するときは選択肢のコードを日本語の表示名に戻す（シートの既存の行と同じ表記） ---
+class RecordingWriter:
+    def __init__(self):
+        self.appended = []
+
+    def append(self, sheet, values):
+        self.appended.extend(values)
+
+
+@pytest.mark.parametrize("variant, sore_throat", [(None, "喉の痛み"), ("survey2", "のどの痛み")])
+def test_export_writes_japanese_labels(monkeypatch, variant, sore_throat):
+    import gsheet_client
+    from admin_export import export_to_gsheet
+    monkeypatch.setattr(gsheet_client, "with_worksheet", lambda name, sheet_name, action, key=None: action(None))
+    monkeypatch.setattr(gsheet_client, "ensure_header", lambda sheet, columns: None)
+    writer = RecordingWriter()
+    rows = [
+        {"id": 1, "injury": "yes", "symptoms": "sore_throat, vomiting", "fatigue": 40, "exported": False},
+        {"id": 2, "injury": "無", "symptoms": "咳, cough", "fatigue": 60, "exported": False},  # コードにする前の行
+    ]
+    export_to_gsheet(rows, writer, "unused", "unused", variant=variant)
+
+    assert writer.appended == [[1, "有", f"{sore_throat}, 嘔吐", 40], [2, "無", "咳, 咳", 60]]
@@ -0,0 +1,51 @@
+import pytest
+import csv_store
+from csv_store import CsvStore
+
+# --- CSV の追記と履歴のページ（件数は追記された分だけ数える） ---
+
+
+@pytest.fixture
+def store(tmp_path):
+    csv_store.get_newline_counts().clear()
+    return CsvStore(str(tmp_path / "history.csv"), ["name", "score"])
+
+
+def test_read_page_newest_first(store):
+    for i in range(5):
+        store.append({"name": f"athlete{i}", "score": i})
+
+    first, last = store.read_page(0, 2), store.read_page(2, 2)
+    assert first["total"] == 5
+    assert [row["name"] for row in first["rows"]] == ["athlete4", "athlete3"]
+    assert [row["name"] for row in last["rows"]] == ["athlete0"]
+
+
+def test_count_only_reads_appended_bytes(store, monkeypatch):
+    for i in range(3):
+        store.append({"name": f"athlete{i}", "score": i})
+    assert store.read_page(0, 10)["total"] == 3
+    counted_size = csv_store.get_newline_counts()[store.path][0]
+
+    seeks = []
+    count_newlines = csv_store.count_newlines
+
+    def spy(path, f, size):
+        original_seek = f.seek
+        f.seek = lambda offset, *args: seeks.append(offset) or original_seek(offset, *args)
+        return count_newlines(path, f, size)
+
+    monkeypatch.setattr(csv_store, "count_newlines", spy)
+    store.append({"name": "athlete3", "score": 3})
+    assert store.read_page(0, 10)["total"] == 4
+    assert seeks[0] == counted_size  # 前回数えた位置から読み始める
+
+
+def test_count_restarts_when_file_is_replaced(store):
+    for i in range(3):
+        store.append({"name": f"athlete{i}", "score": i})
+    assert store.read_page(0, 10)["total"] == 3
+
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write("name,score\nnew,1\n")
+    assert store.read_page(0, 10)["total"] == 1
@@ -0,0 +1,60 @@
+import os
+import time
+import pytest
+import downloads
+
+# --- ダウンロードの一時ファイル（失敗したら消す・古いものは消す） ---
+
+
+@pytest.fixture(autouse=True)
+def download_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloads, "DOWNLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_build_download_csv(monkeypatch, download_dir):
+    monkeypatch.setattr(downloads, "iter_condition_pages", lambda *args: iter([[{"id": 1, "name": "山田"}]]))
+    path, count = downloads.build_download("csv")
+
+    assert count == 1
+    assert os.path.dirname(path) == str(download_dir)
+    assert open(path, encoding="utf-8-sig").read().splitlines() == ["id,name", "1,山田"]
+
+
+# 型が分からない列（column_formats が取れない場合）は、2ページ目以降も最初のページの型にそろえる
+@pytest.mark.parametrize("first, second, expected", [
+    ([3, 4], ["", 5], [3.0, 4.0, None, 5.0]),  # 整数だけのページのあとに "" が混ざったページ
+    (["", 4], [3, 5], ["", "4", "3", "5"]),    # "" が混ざったページのあとに整数だけのページ
+])
+def test_build_download_parquet_keeps_first_page_types(monkeypatch, first, second, expected):
+    import pyarrow.parquet as pq
+    pages = [[{"id": i, "bowel_shape": v} for i, v in enumerate(values)] for values in (first, second)]
+    monkeypatch.setattr(downloads, "iter_condition_pages", lambda *args: iter(pages))
+    monkeypatch.setattr(downloads, "get_supabase_client", lambda: type("Client", (), {"column_formats": lambda self: {}})())
+    path, count = downloads.build_download("parquet")
+
+    assert count == 4
+    values = pq.read_table(path).column("bowel_shape").to_pylist()
+    assert values == expected
+
+
+def test_build_download_removes_file_on_error(monkeypatch, download_dir):
+    def pages(*args):
+        yield [{"id": 1}]
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(downloads, "iter_condition_pages", pages)
+    with pytest.raises(RuntimeError):
+        downloads.build_download("csv")
+    assert list(download_dir.iterdir()) == []
+
+
+def test_remove_stale_downloads(download_dir):
+    old, new = download_dir / "condition_old.csv", download_dir / "condition_new.csv"
+    old.write_text("x")
+    new.write_text("x")
+    past = time.time() - downloads.DOWNLOAD_MAX_AGE - 60
+    os.utime(old, (past, past))
+
+    assert downloads.remove_stale_downloads() == 1
+    assert sorted(p.name for p in download_dir.iterdir()) == ["condition_new.csv"]
@@ -0,0 +1,38 @@
+import pytest
+import requests
+import gsheet_client
+from gsheet_client import SheetWriter, TokenBucket
+
+# --- 追記の再試行（接続できなかったときだけ。送信後のタイムアウトは重複を避けるため再試行しない） ---
+class FlakySheet:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def append_rows(self, rows):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    monkeypatch.setattr(gsheet_client.time, "sleep", lambda seconds: None)
+    return SheetWriter(TokenBucket(rate=1000, capacity=1000), retries=2)
+
+
+@pytest.mark.parametrize("error", [requests.ConnectionError("refused"), requests.ConnectTimeout("connect timeout")])
+def test_append_retries_when_not_connected(writer, error):
+    sheet = FlakySheet(error)
+    writer.append(sheet, [["2025-04-01", "山田"]])
+
+    assert sheet.calls == 2
+    assert writer.summary()["rows"] == 1 and writer.summary()["retries"] == 1
+
+
+def test_append_does_not_retry_read_timeout(writer):
+    sheet = FlakySheet(requests.ReadTimeout("read timeout"))
+    with pytest.raises(requests.ReadTimeout):
+        writer.append(sheet, [["2025-04-01", "山田"]])
+
+    assert sheet.calls == 1  # シートに書けているかもしれないので送り直さない
@@ -0,0 +1,40 @@
+import pytest
+from storage import CsvBackend, SheetsBackend, SqliteBackend
+
+# --- 保存先の共通インターフェース（出力に使えるのは exportable な保存先だけ） ---
+RECORDS = [
+    {"submission_key": f"2025-04-0{day}/A/山田", "date": f"2025-04-0{day}", "team": "A", "name": "山田", "fatigue": day}
+    for day in (1, 2, 3)
+]
+
+
+@pytest.mark.parametrize("backend", [CsvBackend("unused.csv"), SheetsBackend("unused", "unused")])
+def test_non_exportable_backends_have_no_export_methods(backend):
+    assert not backend.exportable
+    assert not hasattr(backend, "iter_unexported") and not hasattr(backend, "mark_exported")
+
+
+def test_sqlite_export_round_trip(tmp_path):
+    storage = SqliteBackend(str(tmp_path / "condition.db"))
+    assert storage.exportable
+    assert [r["ok"] for r in storage.bulk_insert(RECORDS)] == [True]
+    assert storage.insert(dict(RECORDS[0], fatigue=9))["ok"]  # 同じ submission_key は1行に upsert
+
+    rows = [row for page in storage.iter_unexported(page_size=2) for row in page]
+    assert [(row["date"], row["fatigue"]) for row in rows] == [("2025-04-01", 9), ("2025-04-02", 2), ("2025-04-03", 3)]
+
+    assert [r["ok"] for r in storage.mark_exported([rows[0]["id"], rows[1]["id"]])] == [True]
+    assert [row["id"] for page in storage.iter_unexported() for row in page] == [rows[2]["id"]]
+
+
+def test_csv_insert_query_and_read_page(tmp_path):
+    storage = CsvBackend(str(tmp_path / "condition.csv"), ["date", "team", "name", "fatigue"])
+    assert storage.read_page(0, 10)["total"] == 0
+    assert [r["ok"] for r in storage.bulk_insert(RECORDS)] == [True, True, True]
+
+    rows = [row for page in storage.query(date_from="2025-04-02") for row in page]
+    assert [row["date"] for row in rows] == ["2025-04-02", "2025-04-03"]
+
+    history = storage.read_page(0, 2)
+    assert history["total"] == 3
+    assert [row["date"] for row in history["rows"]] == ["2025-04-03", "2025-04-02"]  # 新しい順
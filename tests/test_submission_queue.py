@@ -0,0 +1,34 @@
+import time
+from submission_queue import SubmissionQueue
+
+# --- 送信スレッド（予期しないエラーでも止まらず、エラーを記録して再送する） ---
+class FlakyClient:
+    def __init__(self, failures):
+        self.failures = failures
+        self.inserted = []
+
+    def bulk_insert(self, records, on_conflict=None):
+        if self.failures:
+            self.failures -= 1
+            raise ValueError("unexpected response")
+        self.inserted.extend(records)
+        return [{"start": 0, "count": len(records), "ok": True, "status": "201"}]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_flusher_survives_unexpected_errors(tmp_path):
+    client = FlakyClient(failures=3)
+    queue = SubmissionQueue(client, path=str(tmp_path / "queue.db"), interval=0.05)
+    queue.enqueue({"submission_key": "2025-04-01/A/山田", "name": "山田"})
+    queue.start()
+
+    wait_until(lambda: queue.stats()["last_error"] == "ValueError: unexpected response")
+    wait_until(lambda: queue.stats()["depth"] == 0)  # スレッドは止まらず、次の回で送れた
+    assert client.inserted == [{"submission_key": "2025-04-01/A/山田", "name": "山田"}]
+    assert queue.stats()["last_error"] is None
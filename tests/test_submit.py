@@ -0,0 +1,151 @@
+import json
+import pytest
+from conftest import ROOT
+
+# --- 送信ボタン：1回押すと Supabase へ1回 POST し、お礼のページを表示する ---
+ROW_INSERTS = lambda postgrest: [r for r in postgrest.received if r["method"] == "POST" and r["path"] == "/rest/v1/condition"]
+MESSAGES = json.load(open(ROOT / "messages.json", encoding="utf-8"))
+
+
+# st.success / st.error は先頭の絵文字をアイコンとして分けるので、本文だけを比べる
+def without_icon(message):
+    return message.split(" ", 1)[1]
+
+
+def thanks_shown(at, lang):
+    return [s.value for s in at.success] == [without_icon(MESSAGES[lang]["thanks"])]
+
+
+def fill_questionnaire(at, symptoms=("none",), sleep_issues=()):
+    at.text_input(key="team").input("A")
+    at.text_input(key="name").input("山田")
+    for code in sleep_issues:
+        at.multiselect(key="sleep_issues").select(code)
+    for code in symptoms:
+        at.multiselect(key="symptoms").select(code)
+    at.selectbox(key="exercise_time").set_value(60)
+    at.selectbox(key="exercise_rpe").set_value(5)
+
+
+@pytest.mark.parametrize("form", ["1", "0"])  # フォームモード・逐次モード
+def test_survey6_one_tap_sends_one_post(app, postgrest, form):
+    at = app("survey6.py")
+    at.query_params["form"] = form
+    at.run()
+    fill_questionnaire(at)
+    at.button[0].click().run()
+
+    assert not at.exception
+    inserts = ROW_INSERTS(postgrest)
+    assert len(inserts) == 1
+    assert inserts[0]["params"] == {"on_conflict": "submission_key"}
+    assert inserts[0]["body"][0]["name"] == "山田"
+    assert thanks_shown(at, "ja")
+
+
+def test_survey6_validation_error_keeps_button_usable(app, postgrest):
+    at = app("survey6.py")
+    at.run()
+    at.button[0].click().run()  # 未入力のまま送信
+    assert ROW_INSERTS(postgrest) == []
+    assert at.error and not at.button[0].disabled
+
+    fill_questionnaire(at)
+    at.button[0].click().run()
+    assert len(ROW_INSERTS(postgrest)) == 1
+    assert thanks_shown(at, "ja")
+
+
+def test_survey6_click_while_in_flight_is_ignored(app, postgrest):
+    at = app("survey6.py")
+    at.run()
+    fill_questionnaire(at)
+    at.session_state["submitting"] = True  # 前のクリックの送信がまだ終わっていない
+    at.button[0].click().run()
+
+    assert ROW_INSERTS(postgrest) == []
+    assert not at.success and not at.error
+
+    at.session_state["submitting"] = False
+    at.button[0].click().run()
+    assert len(ROW_INSERTS(postgrest)) == 1
+    assert thanks_shown(at, "ja")
+
+
+def test_survey5_sends_in_english(app, postgrest):
+    at = app("survey5.py")
+    at.run()
+    fill_questionnaire(at)
+    at.button[0].click().run()
+
+    assert not at.exception
+    assert len(ROW_INSERTS(postgrest)) == 1
+    assert thanks_shown(at, "en")
+
+
+def test_survey2_one_tap_sends_one_post(app, postgrest):
+    at = app("survey2.py")
+    at.run()
+    fill_questionnaire(at, symptoms=("cough", "vomiting"), sleep_issues=("none",))
+    at.button[0].click().run()
+
+    assert not at.exception
+    inserts = ROW_INSERTS(postgrest)
+    assert len(inserts) == 1
+    assert inserts[0]["body"][0]["symptoms"] == "cough, vomiting"  # 選択肢はコードで保存する
+    assert thanks_shown(at, "en")
+
+
+# --- survey2・survey3 はスライダーの向きと選択肢を旧版のまま使う（既存の行と値の意味をそろえる） ---
+def test_survey2_keeps_its_slider_orientation(app):
+    at = app("survey2.py")
+    at.run()
+
+    markdown = " ".join(m.value for m in at.markdown)
+    assert "<span>Very Bad</span><span>Very Good</span>" in markdown
+    assert "<span>Very Hard</span><span>Very Easy</span>" in markdown
+    assert "Vomiting" in at.multiselect(key="symptoms").options
+
+
+@pytest.mark.parametrize("script", ["survey3.py", "survey3OK.py", "survey4.py"])
+def test_sheets_surveys_render_from_schema(app, script):
+    at = app(script)
+    at.run()
+    at.button[0].click().run()  # 未入力のまま送信（シートには接続しない）
+
+    assert not at.exception
+    *field_errors, summary = [e.value for e in at.error]
+    assert summary.splitlines()[0] == without_icon(MESSAGES["ja"]["errors_summary"].format(count=4))
+    assert len(field_errors) == 4  # 入力欄ごとのエラーも描画し直して表示する
+
+
+# --- 保存先は get_storage で選ぶ（アプリごとの保存先は secrets の [storage.<app>] で CSV に向ける） ---
+def test_survey_appends_through_storage(app, tmp_path):
+    path = tmp_path / "condition_survey.csv"
+    # survey6 向けの共通の設定（storage_backend・csv_path）は、保存先を引数で決めている survey.py には効かない
+    at = app("survey.py", storage_backend="sqlite", csv_path=str(tmp_path / "survey6.csv"),
+             storage={"survey": {"csv_path": str(path)}})
+    at.run()
+    at.text_input[0].input("山田")
+    at.button[0].click().run()
+
+    assert not at.exception
+    assert [s.value for s in at.success] == ["回答ありがとうございました！"]
+    assert path.read_text(encoding="utf-8").splitlines()[1].startswith("山田,")
+
+
+def test_survey3_appends_through_storage(app, tmp_path):
+    path = tmp_path / "condition.csv"
+    at = app("survey3.py", storage={"survey3": {"storage_backend": "csv", "csv_path": str(path)}})
+    at.run()
+    fill_questionnaire(at, symptoms=("sore_throat", "vomiting"))
+    at.button[0].click().run()
+
+    assert not at.exception
+    assert [s.value for s in at.success] == ["Googleスプレッドシートに送信しました！"]
+    header, row = path.read_text(encoding="utf-8").splitlines()
+    assert header.startswith("date,team,name,")
+    assert "山田" in row and "のどの痛み, 嘔吐" in row  # シートの既存の行と同じ表記
+    markdown = " ".join(m.value for m in at.markdown)
+    assert "<span>とても悪い</span><span>とても良い</span>" in markdown
+    assert "<span>とても強い</span><span>全く無い</span>" in markdown
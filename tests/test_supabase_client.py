@@ -0,0 +1,119 @@
+import json
+from urllib.parse import parse_qsl, urlsplit
+import pytest
+from supabase_client import SupabaseClient, build_filters, quote_value, DAILY_COUNTS_VIEW, ATHLETE_AVERAGES_RPC
+
+# --- supabase_client を偽の PostgREST に向けて、送るパス・クエリ・本文を確かめる ---
+ROWS = [{"id": i, "name": f"athlete{i}"} for i in range(1, 8)]
+
+
+@pytest.fixture
+def client(postgrest):
+    return SupabaseClient(postgrest.url, "test-key", retries=0)
+
+
+# id=gt.<最終id> と limit を見て ROWS から1ページ分を返す
+def serve_pages(postgrest):
+    def do_GET(self):
+        query = dict(parse_qsl(urlsplit(self.path).query))
+        after = int(query.get("id", "gt.0").split(".")[1])
+        limit = int(query["limit"])
+        self._reply(200, [row for row in ROWS if row["id"] > after][:limit])
+
+    postgrest.do_GET = do_GET
+
+
+# --- 取得条件の組み立て ---
+def test_build_filters_dates_and_columns():
+    params = build_filters(columns=["team", "name"], date_from="2025-04-01", date_to="2025-04-30")
+    assert params == {"select": "team,name", "and": "(date.gte.2025-04-01,date.lte.2025-04-30)"}
+    assert build_filters() == {}
+
+
+@pytest.mark.parametrize("team, quoted", [
+    ("A", '"A"'),
+    ("実業団, NF", '"実業団, NF"'),
+    ('Team "B"', '"Team \\"B\\""'),
+    ("C(1)", '"C(1)"'),
+    ("back\\slash", '"back\\\\slash"'),
+])
+def test_quote_value(team, quoted):
+    assert quote_value(team) == quoted
+
+
+def test_team_filter_quotes_commas_and_quotes(client, postgrest):
+    client.daily_counts(teams=["実業団, NF", 'Team "B"'])
+    assert postgrest.received[0]["params"]["team"] == 'in.("実業団, NF","Team \\"B\\"")'
+
+
+# --- キーセットページング ---
+def test_iter_pages_keyset(client, postgrest):
+    serve_pages(postgrest)
+    pages = list(client.iter_pages({"select": "*"}, page_size=3))
+
+    assert [[row["id"] for row in page] for page in pages] == [[1, 2, 3], [4, 5, 6], [7]]
+    assert [r["params"].get("id") for r in postgrest.received] == [None, "gt.3", "gt.6", "gt.7"]
+    assert all(r["params"]["order"] == "id.asc" and r["params"]["limit"] == "3" for r in postgrest.received)
+
+
+def test_iter_pages_after_id(client, postgrest):
+    serve_pages(postgrest)
+    pages = list(client.iter_pages({"select": "*"}, page_size=10, after_id=5))
+
+    assert [row["id"] for page in pages for row in page] == [6, 7]
+    assert postgrest.received[0]["params"]["id"] == "gt.5"
+
+
+# --- サーバー側の集計（ビュー・RPC） ---
+def test_daily_counts_reads_view(client, postgrest):
+    assert client.daily_counts("2025-04-01", "2025-04-30", ["A"]) == []
+
+    request = postgrest.received[0]
+    assert request["method"] == "GET"
+    assert request["path"] == f"/rest/v1/{DAILY_COUNTS_VIEW}"
+    assert request["params"] == {
+        "and": "(date.gte.2025-04-01,date.lte.2025-04-30)",
+        "team": 'in.("A")',
+        "order": "date.desc,team.asc"
+    }
+
+
+def test_athlete_averages_calls_rpc(client, postgrest):
+    assert client.athlete_averages("2025-04-01", "2025-04-30", ["A", "B"], columns=["team", "name", "fatigue"]) == []
+
+    request = postgrest.received[0]
+    assert request["method"] == "POST"
+    assert request["path"] == f"/rest/v1/rpc/{ATHLETE_AVERAGES_RPC}"
+    assert request["body"] == {"date_from": "2025-04-01", "date_to": "2025-04-30"}
+    assert request["params"] == {"select": "team,name,fatigue", "team": 'in.("A","B")', "order": "team.asc,name.asc"}
+
+
+# --- exported=true への更新 ---
+def test_mark_exported_chunks(client, postgrest):
+    results = client.mark_exported(list(range(1, 251)), chunk_size=100)
+
+    assert [r["ok"] for r in results] == [True, True, True]
+    assert [len(r["ids"]) for r in results] == [100, 100, 50]
+    patches = postgrest.received
+    assert [r["method"] for r in patches] == ["PATCH"] * 3
+    assert patches[0]["params"]["id"] == f"in.({','.join(str(i) for i in range(1, 101))})"
+    assert patches[2]["params"]["id"] == f"in.({','.join(str(i) for i in range(201, 251))})"
+    assert all(r["body"] == {"exported": True} for r in patches)
+
+
+def test_mark_exported_reports_failed_chunk(client, postgrest):
+    postgrest.do_PATCH = lambda self: self._reply(500, b'{"message": "boom"}')
+    results = client.mark_exported([1, 2, 3], chunk_size=2)
+
+    assert [(r["ids"], r["ok"], r["status"]) for r in results] == [([1, 2], False, 500), ([3], False, 500)]
+
+
+# --- 一括追加（件数で区切り、upsert のキーを付ける） ---
+def test_bulk_insert_batches(client, postgrest):
+    records = [{"name": f"athlete{i}"} for i in range(5)]
+    results = client.bulk_insert(records, batch_size=2, on_conflict="submission_key")
+
+    assert [(r["start"], r["count"], r["ok"]) for r in results] == [(0, 2, True), (2, 2, True), (4, 1, True)]
+    assert [json.dumps(r["body"]) for r in postgrest.received] == [json.dumps(records[i:i + 2]) for i in (0, 2, 4)]
+    assert all(r["params"] == {"on_conflict": "submission_key"} for r in postgrest.received)
+    assert all("resolution=merge-duplicates" in r["headers"]["Prefer"] for r in postgrest.received)
@@ -0,0 +1,54 @@
+# --- 入力チェック（表駆動） ---
+# 質問ごとのルールは questionnaire.json の内容から決まる。
+#   required: true      → 必須（visible_if があれば、表示されているときだけ必須）
+#   min/max・range      → 範囲
+# ルールは読み込み時に1回だけ決めておき、送信時にすべての質問を1回で評価してエラーを質問の key ごとに返す。
+# ルールを増やすときは check_* を書いて RULES と compile_rules に足す。
+
+
+def is_blank(value):
+    return value is None or value == "" or value == []
+
+
+def bounds(spec):
+    if "range" in spec:
+        return tuple(spec["range"])
+    return spec["min"], spec["max"]
+
+
+def check_required(spec, value, messages):
+    if is_blank(value):
+        return messages[spec["key"] + ".required"]
+    return None
+
+
+def check_range(spec, value, messages):
+    low, high = bounds(spec)
+    if is_blank(value) or low <= value <= high:
+        return None
+    return messages["range_error"].format(label=messages[spec["key"] + ".label"], min=low, max=high)
+
+
+RULES = {
+    "required": check_required,
+    "range": check_range
+}
+
+
+# --- 質問に適用するルール名の一覧（必須を先に評価する） ---
+def compile_rules(spec):
+    rules = []
+    if spec.get("required"):
+        rules.append("required")
+    if "range" in spec or ("min" in spec and "max" in spec):
+        rules.append("range")
+    return tuple(rules)
+
+
+# --- 質問1件のチェック（最初に引っかかったルールのメッセージを返す） ---
+def check_question(spec, value, messages):
+    for rule in spec["rules"]:
+        message = RULES[rule](spec, value, messages)
+        if message:
+            return message
+    return None